@@ -0,0 +1,74 @@
+"""daily analytics rollup tables, watermark table and source timestamp indexes
+
+Revision ID: 20261017_09
+Revises: 20261017_08
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_09"
+down_revision = "20261017_08"
+branch_labels = None
+depends_on = None
+
+# Range scans by the aggregator (rows newer than the watermark)
+SOURCE_INDEXES = [
+    ("ix_course_views_viewed_at", "course_views", ["viewed_at"]),
+    ("ix_user_engagements_created_at", "user_engagements", ["created_at"]),
+    ("ix_users_created_at", "users", ["created_at"]),
+    ("ix_payments_created_at", "payments", ["created_at"]),
+    ("ix_payments_updated_at", "payments", ["updated_at"]),
+    ("ix_enrollments_purchased_at", "enrollments", ["purchased_at"]),
+]
+
+
+def upgrade():
+    op.create_table(
+        "course_stats_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("course_id", sa.Integer(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("unique_viewers", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("enrollments", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("payments", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed_payments", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["course_id"], ["courses.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("day", "course_id"),
+    )
+    op.create_index("ix_course_stats_daily_course_id", "course_stats_daily", ["course_id"], unique=False)
+    op.create_table(
+        "engagement_stats_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("engagement_type", sa.String(), nullable=False),
+        sa.Column("events", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("unique_users", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("day", "engagement_type"),
+    )
+    op.create_table(
+        "signup_stats_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("signups", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    op.create_table(
+        "analytics_watermarks",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    for name, table, columns in SOURCE_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _columns in reversed(SOURCE_INDEXES):
+        op.drop_index(name, table_name=table)
+    op.drop_table("analytics_watermarks")
+    op.drop_table("signup_stats_daily")
+    op.drop_table("engagement_stats_daily")
+    op.drop_index("ix_course_stats_daily_course_id", table_name="course_stats_daily")
+    op.drop_table("course_stats_daily")
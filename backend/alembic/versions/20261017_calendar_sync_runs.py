@@ -0,0 +1,44 @@
+"""calendar_sync_runs history / queue for the calendar worker
+
+Revision ID: 20261017_08
+Revises: 20261017_07
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_08"
+down_revision = "20261017_07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "calendar_sync_runs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("trigger", sa.String(), nullable=False, server_default="schedule"),
+        sa.Column("requested_by", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False, server_default="pending"),
+        sa.Column("full_sync", sa.Boolean(), nullable=True),
+        sa.Column("events_seen", sa.Integer(), nullable=True),
+        sa.Column("created", sa.Integer(), nullable=True),
+        sa.Column("updated", sa.Integer(), nullable=True),
+        sa.Column("deleted", sa.Integer(), nullable=True),
+        sa.Column("duration_ms", sa.Integer(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_calendar_sync_runs_id", "calendar_sync_runs", ["id"], unique=False)
+    op.create_index("ix_calendar_sync_runs_status", "calendar_sync_runs", ["status"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_calendar_sync_runs_status", table_name="calendar_sync_runs")
+    op.drop_index("ix_calendar_sync_runs_id", table_name="calendar_sync_runs")
+    op.drop_table("calendar_sync_runs")
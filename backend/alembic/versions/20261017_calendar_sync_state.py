@@ -0,0 +1,44 @@
+"""calendar_sync_state table for incremental Google Calendar sync
+
+Revision ID: 20261017_07
+Revises: 20261017_06
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_07"
+down_revision = "20261017_06"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "calendar_sync_state",
+        sa.Column("calendar_id", sa.String(), nullable=False),
+        sa.Column("sync_token", sa.String(), nullable=True),
+        sa.Column("last_full_sync_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("calendar_id"),
+    )
+    # Attendee diffing looks rows up by (live_class_id, email); drop any duplicate pairs first
+    op.execute(
+        """
+        DELETE FROM live_class_attendees a
+        USING (
+            SELECT id, row_number() OVER (PARTITION BY live_class_id, email ORDER BY id) AS rn
+            FROM live_class_attendees
+        ) d
+        WHERE a.id = d.id AND d.rn > 1
+        """
+    )
+    op.create_index(
+        "ix_live_class_attendees_live_class_id_email", "live_class_attendees", ["live_class_id", "email"], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index("ix_live_class_attendees_live_class_id_email", table_name="live_class_attendees")
+    op.drop_table("calendar_sync_state")
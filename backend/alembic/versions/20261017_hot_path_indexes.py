@@ -0,0 +1,87 @@
+"""composite and unique indexes for the per-user / per-course filter paths
+
+Revision ID: 20261017_05
+Revises: 20261017_04
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_05"
+down_revision = "20261017_04"
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns, unique)
+INDEXES = [
+    ("ix_enrollments_user_id_course_id", "enrollments", ["user_id", "course_id"], True),
+    ("ix_enrollments_course_id", "enrollments", ["course_id"], False),
+    ("ix_payments_user_id_status", "payments", ["user_id", "status"], False),
+    ("ix_payments_course_id", "payments", ["course_id"], False),
+    ("ix_live_classes_course_id_scheduled_at", "live_classes", ["course_id", "scheduled_at"], False),
+    ("ix_live_classes_scheduled_at", "live_classes", ["scheduled_at"], False),
+    ("ix_notes_user_id_lesson_id", "notes", ["user_id", "lesson_id"], False),
+    ("ix_notes_lesson_id", "notes", ["lesson_id"], False),
+    ("ix_modules_course_id_order_index", "modules", ["course_id", "order_index"], False),
+    ("ix_lessons_module_id_order_index", "lessons", ["module_id", "order_index"], False),
+    ("ix_certifications_user_id_course_id", "certifications", ["user_id", "course_id"], True),
+    ("ix_onboarding_steps_user_id_step_name", "onboarding_steps", ["user_id", "step_name"], True),
+    ("ix_interview_preps_user_id", "interview_preps", ["user_id"], False),
+    ("ix_resumes_user_id", "resumes", ["user_id"], False),
+    ("ix_client_connections_user_id", "client_connections", ["user_id"], False),
+]
+
+
+def upgrade():
+    # The unique indexes need existing duplicates gone first (double-click enrolls etc.).
+    # Enrollments keep the row with the most progress, onboarding steps the oldest row.
+    # Duplicate certificates are never deleted: each has its own certificate number and
+    # verification code that may already have been handed out, so they need a human.
+    conflicts = op.get_bind().execute(sa.text(
+        """
+        SELECT user_id, course_id, array_agg(certificate_number ORDER BY id) AS numbers
+        FROM certifications
+        GROUP BY user_id, course_id
+        HAVING count(*) > 1
+        ORDER BY user_id, course_id
+        """
+    )).all()
+    if conflicts:
+        pairs = "\n".join(
+            f"  user_id={row.user_id} course_id={row.course_id} certificates={', '.join(map(str, row.numbers))}"
+            for row in conflicts
+        )
+        raise RuntimeError(
+            "certifications has several certificates for the same (user_id, course_id); "
+            "decide which to keep, remove or re-assign the others, then rerun the migration:\n" + pairs
+        )
+    op.execute(
+        """
+        DELETE FROM enrollments e
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, course_id ORDER BY progress DESC NULLS LAST, id
+            ) AS rn
+            FROM enrollments
+        ) d
+        WHERE e.id = d.id AND d.rn > 1
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM onboarding_steps t
+        USING (
+            SELECT id, row_number() OVER (PARTITION BY user_id, step_name ORDER BY id) AS rn
+            FROM onboarding_steps
+        ) d
+        WHERE t.id = d.id AND d.rn > 1
+        """
+    )
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, _columns, _unique in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
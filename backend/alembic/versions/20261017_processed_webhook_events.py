@@ -0,0 +1,28 @@
+"""processed_webhook_events for idempotent Razorpay webhook handling
+
+Revision ID: 20261017_10
+Revises: 20261017_09
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_10"
+down_revision = "20261017_09"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "processed_webhook_events",
+        sa.Column("event_id", sa.String(), nullable=False),
+        sa.Column("event", sa.String(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("event_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("processed_webhook_events")
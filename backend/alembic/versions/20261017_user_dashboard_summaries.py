@@ -0,0 +1,34 @@
+"""user_dashboard_summaries rollup table
+
+Revision ID: 20261017_06
+Revises: 20261017_05
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_06"
+down_revision = "20261017_05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Starts empty: rows are built on the first dashboard read per user
+    op.create_table(
+        "user_dashboard_summaries",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("enrollments_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_paid", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("upcoming_live_classes_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("recorded_classes_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("valid_until", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("user_dashboard_summaries")
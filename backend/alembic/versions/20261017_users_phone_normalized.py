@@ -0,0 +1,43 @@
+"""add users.phone_normalized with unique index for indexed phone lookup
+
+Revision ID: 20261017_01
+Revises: 20260129_01
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_01"
+down_revision = "20260129_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("phone_normalized", sa.String(), nullable=True))
+    # Backfill digits-only phone. If several legacy rows share the same digits, only the
+    # oldest account keeps the normalized value so the unique index can be created.
+    op.execute(
+        """
+        UPDATE users u
+        SET phone_normalized = d.digits
+        FROM (
+            SELECT id, digits,
+                   row_number() OVER (PARTITION BY digits ORDER BY id) AS rn
+            FROM (
+                SELECT id, regexp_replace(phone, '[^0-9]', '', 'g') AS digits
+                FROM users
+                WHERE phone IS NOT NULL
+            ) p
+            WHERE digits <> ''
+        ) d
+        WHERE u.id = d.id AND d.rn = 1
+        """
+    )
+    op.create_index("ix_users_phone_normalized", "users", ["phone_normalized"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_users_phone_normalized", table_name="users")
+    op.drop_column("users", "phone_normalized")
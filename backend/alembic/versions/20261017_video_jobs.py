@@ -0,0 +1,45 @@
+"""video processing job queue, HLS playlist and processing status on video_contents
+
+Revision ID: 20261017_03
+Revises: 20261017_02
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_03"
+down_revision = "20261017_02"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("video_contents", sa.Column("hls_playlist_path", sa.String(), nullable=True))
+    op.add_column("video_contents", sa.Column("processing_status", sa.String(), nullable=True))
+    op.create_table(
+        "video_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("video_content_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("run_after", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["video_content_id"], ["video_contents.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_video_jobs_id", "video_jobs", ["id"], unique=False)
+    op.create_index("ix_video_jobs_video_content_id", "video_jobs", ["video_content_id"], unique=False)
+    op.create_index("ix_video_jobs_status", "video_jobs", ["status"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_video_jobs_status", table_name="video_jobs")
+    op.drop_index("ix_video_jobs_video_content_id", table_name="video_jobs")
+    op.drop_index("ix_video_jobs_id", table_name="video_jobs")
+    op.drop_table("video_jobs")
+    op.drop_column("video_contents", "processing_status")
+    op.drop_column("video_contents", "hls_playlist_path")
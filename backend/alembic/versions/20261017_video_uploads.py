@@ -0,0 +1,42 @@
+"""resumable video uploads and content-hash storage
+
+Revision ID: 20261017_02
+Revises: 20261017_01
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_02"
+down_revision = "20261017_01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("video_contents", sa.Column("content_hash", sa.String(), nullable=True))
+    op.create_index("ix_video_contents_content_hash", "video_contents", ["content_hash"], unique=False)
+    op.create_table(
+        "video_uploads",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("lesson_id", sa.Integer(), nullable=True),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("total_size", sa.BigInteger(), nullable=False),
+        sa.Column("received_bytes", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("status", sa.String(), nullable=False, server_default="uploading"),
+        sa.Column("video_content_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["lesson_id"], ["lessons.id"]),
+        sa.ForeignKeyConstraint(["video_content_id"], ["video_contents.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("video_uploads")
+    op.drop_index("ix_video_contents_content_hash", table_name="video_contents")
+    op.drop_column("video_contents", "content_hash")
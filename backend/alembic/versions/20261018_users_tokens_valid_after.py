@@ -0,0 +1,22 @@
+"""users.tokens_valid_after: durable access-token revocation
+
+Revision ID: 20261017_12
+Revises: 20261017_11
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261017_12"
+down_revision = "20261017_11"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("tokens_valid_after", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column("users", "tokens_valid_after")
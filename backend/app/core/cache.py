@@ -0,0 +1,121 @@
+"""
+In-process TTL/LRU cache for the public catalog (courses, roadmaps, testimonials).
+Entries hold the serialized JSON body and its strong ETag, so a hit (or a matching
+If-None-Match) is answered without a DB query or re-running Pydantic.
+Admin write handlers call bump_catalog_version(namespace); keys include the version,
+so older entries simply stop being read and age out of the LRU. The cache is per
+worker process: other workers pick up a change within CATALOG_CACHE_TTL_SECONDS.
+"""
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+class TTLCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class CachedBody:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+_catalog_cache = TTLCache(settings.CATALOG_CACHE_MAX_ENTRIES, settings.CATALOG_CACHE_TTL_SECONDS)
+_catalog_versions: Dict[str, int] = {}
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def bump_catalog_version(namespace: str) -> None:
+    """Invalidate every cached response in `namespace` (call after an admin write commits)."""
+    _catalog_versions[namespace] = _catalog_versions.get(namespace, 0) + 1
+
+
+def _adapter(response_type: Any) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+
+def _catalog_key(namespace: str, params: Hashable) -> Tuple[str, int, Hashable]:
+    return (namespace, _catalog_versions.get(namespace, 0), params)
+
+
+def _serialize(response_type: Any, rows: Any) -> CachedBody:
+    """Serialize ORM rows with the route's response model once."""
+    adapter = _adapter(response_type)
+    return CachedBody(adapter.dump_json(adapter.validate_python(rows, from_attributes=True)))
+
+
+def catalog_response(request: Request, entry: CachedBody) -> Response:
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={settings.CATALOG_CACHE_TTL_SECONDS}",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and entry.etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def cached_catalog_response(
+    request: Request,
+    namespace: str,
+    params: Hashable,
+    response_type: Any,
+    load: Callable[[], Any],
+) -> Response:
+    """Serve from cache, or call `load()` (sync or async) for the rows, cache the serialized body and serve it."""
+    # Key is taken before loading: a bump during the load must not file stale rows under the new version
+    key = _catalog_key(namespace, params)
+    entry = _catalog_cache.get(key)
+    if entry is None:
+        rows = load()
+        if inspect.isawaitable(rows):
+            rows = await rows
+        entry = _serialize(response_type, rows)
+        _catalog_cache.set(key, entry)
+    return catalog_response(request, entry)
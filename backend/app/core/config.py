@@ -3,26 +3,102 @@ from typing import List
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str = ""  # defaults to DATABASE_URL with the postgresql+asyncpg driver
+    # Connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 = server default
+    DB_PGBOUNCER_MODE: bool = False  # NullPool + no prepared statements, for PgBouncer transaction pooling
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    VIDEO_STREAM_TOKEN_EXPIRE_MINUTES: int = 120
+    # video id -> file path entries kept per process for signed range requests
+    VIDEO_PATH_CACHE_MAX_ENTRIES: int = 10000
+    # bcrypt cost for new hashes; older hashes are upgraded on the next successful login
+    BCRYPT_ROUNDS: int = 12
+    # Per worker process: threads hashing/verifying passwords, and how many more may wait before 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32
     RAZORPAY_KEY_ID: str
     RAZORPAY_KEY_SECRET: str
+    # Secret set on the Razorpay dashboard webhook; /api/payments/webhook rejects deliveries without it
+    RAZORPAY_WEBHOOK_SECRET: str = ""
+    # "razorpay", or "fake" for offline load tests (refused when ENVIRONMENT=production)
+    PAYMENT_GATEWAY: str = "razorpay"
+    # Gateway calls (see services/payment_gateway.py), per worker process
+    RAZORPAY_TIMEOUT_SECONDS: float = 10.0
+    RAZORPAY_MAX_WORKERS: int = 8
+    RAZORPAY_MAX_QUEUE: int = 32
+    RAZORPAY_RETRIES: int = 2
+    RAZORPAY_RETRY_BASE_SECONDS: float = 0.2
+    RAZORPAY_BREAKER_FAILURES: int = 5
+    RAZORPAY_BREAKER_RESET_SECONDS: float = 30.0
     ENVIRONMENT: str = "development"
     CORS_ORIGINS: str = "http://localhost:3000"
     GOOGLE_MEET_BASE_URL: str = "https://meet.google.com"
     UPLOAD_DIR: str = "./uploads"
     VIDEO_DIR: str = "./uploads/videos"
+    # Internal nginx location that aliases VIDEO_DIR (e.g. "/protected-videos/"). When set, /api/video/stream
+    # only authorizes and returns X-Accel-Redirect; nginx ships the bytes. Empty = stream from Python.
+    VIDEO_ACCEL_REDIRECT_LOCATION: str = ""
+    # Background processing (python -m app.workers.video_worker): ffmpeg/ffprobe binaries, HLS ladder heights
+    FFMPEG_BINARY: str = "ffmpeg"
+    FFPROBE_BINARY: str = "ffprobe"
+    VIDEO_HLS_RENDITIONS: str = "360,480,720,1080"
+    VIDEO_HLS_SEGMENT_SECONDS: int = 6
+    VIDEO_WORKER_POLL_SECONDS: float = 5.0
+    # Tries per video job before it is marked failed (missing source files fail at once)
+    VIDEO_JOB_MAX_ATTEMPTS: int = 3
     MAX_UPLOAD_SIZE: int = 1073741824
     GOOGLE_APPLICATION_CREDENTIALS: str = ""
     FRONTEND_URL: str = ""
     GOOGLE_CALENDAR_ID: str = ""
     GOOGLE_CALENDAR_DEFAULT_COURSE_ID: int = 1
+    # Calendar worker (python -m app.workers.calendar_worker); interval 0 = only runs queued via the API
+    CALENDAR_SYNC_INTERVAL_SECONDS: int = 900
+    CALENDAR_SYNC_JITTER_SECONDS: int = 60
+    CALENDAR_SYNC_BACKOFF_BASE_SECONDS: int = 60
+    CALENDAR_SYNC_BACKOFF_MAX_SECONDS: int = 3600
+    CALENDAR_WORKER_POLL_SECONDS: float = 5.0
+    # GET /metrics (Prometheus text format), off by default. Scrapers send METRICS_TOKEN as a Bearer
+    # token; enabling it without a token is refused when ENVIRONMENT=production
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str = ""
+    # Analytics rollup worker (python -m app.workers.analytics_worker)
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = 300
+    ANALYTICS_ROLLUP_LAG_SECONDS: int = 120
+    # Outbox dispatcher (python -m app.workers.outbox_worker)
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE_SECONDS: float = 5.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 3600.0
+    OUTBOX_RETENTION_DAYS: int = 7
+    # Public catalog cache (courses, roadmaps, testimonials); also the browser max-age
+    CATALOG_CACHE_TTL_SECONDS: int = 60
+    CATALOG_CACHE_MAX_ENTRIES: int = 256
+    # Authenticated-user principal cache (see core/user_cache.py)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    # Enrolled-course cache for lesson access checks (see core/entitlements.py)
+    ENTITLEMENT_CACHE_TTL_SECONDS: int = 60
+    # Dashboard summary rollup table (see services/dashboard_summary.py); off = one CTE query per load
+    DASHBOARD_SUMMARY_ROLLUP: bool = True
+    DASHBOARD_SUMMARY_MAX_AGE_SECONDS: int = 300
 
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
+    @property
+    def video_hls_rendition_heights(self) -> List[int]:
+        return sorted(int(h) for h in self.VIDEO_HLS_RENDITIONS.split(",") if h.strip())
+
     class Config:
         env_file = ".env"
         case_sensitive = True
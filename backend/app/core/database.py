@@ -1,11 +1,33 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_pool import async_pool_metrics, engine_options, sync_pool_metrics
+from app.core.metrics import instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
+# Sync engine: Alembic, scripts, workers and routers not yet migrated to AsyncSession
+engine = create_engine(settings.DATABASE_URL, **engine_options(is_async=False))
+sync_pool_metrics.attach(engine.pool)
+instrument_engine(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _async_database_url() -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = settings.DATABASE_URL
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+# Async engine (asyncpg) for async def routers, so queries don't block the event loop
+async_engine = create_async_engine(_async_database_url(), **engine_options(is_async=True))
+async_pool_metrics.attach(async_engine.sync_engine.pool)
+instrument_engine(async_engine.sync_engine, "async")
+# expire_on_commit=False: response models read attributes after commit, and lazy reloads aren't allowed in async
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -15,5 +37,6 @@ def get_db():
     finally:
         db.close()
 
-
-
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,159 @@
+"""
+Connection pool configuration and metrics for the sync and async engines.
+Pool sizing comes from Settings (DB_POOL_*). DB_PGBOUNCER_MODE switches to NullPool
+and disables prepared statements so the app can sit behind PgBouncer in transaction
+pooling mode. Metrics are per worker process; see GET /api/admin/db/pool.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from app.core.config import settings
+
+
+class PoolMetrics:
+    """Counters fed by pool events plus checkout wait time measured in the pool itself."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._connected_at: Dict[int, float] = {}
+
+    def attach(self, pool: Pool) -> None:
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "close", self._on_close)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        pool.metrics = self
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+            self._connected_at[id(dbapi_connection)] = time.monotonic()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_close(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.closes += 1
+            self._connected_at.pop(id(dbapi_connection), None)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - t for t in self._connected_at.values()]
+            data: Dict[str, Any] = {
+                "pool_class": type(pool).__name__,
+                "checkouts_total": self.checkouts,
+                "checkins_total": self.checkins,
+                "connects_total": self.connects,
+                "closes_total": self.closes,
+                "invalidations_total": self.invalidations,
+                "checkout_wait_avg_ms": round(self.wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+                "checkout_wait_max_ms": round(self.wait_max * 1000, 3),
+                "open_connections": len(ages),
+                "connection_age_max_s": round(max(ages), 1) if ages else 0.0,
+                "connection_age_avg_s": round(sum(ages) / len(ages), 1) if ages else 0.0,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+            })
+        return data
+
+
+class _WaitTimingMixin:
+    """Times _do_get, i.e. how long a request waited for a pooled connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() builds a new pool; keep reporting into the same metrics
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+def engine_options(is_async: bool) -> Dict[str, Any]:
+    """Keyword arguments for create_engine / create_async_engine built from Settings."""
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    connect_args: Dict[str, Any] = {}
+
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer owns pooling; a second pool here would just pin server connections
+        options["poolclass"] = NullPool
+        if is_async:
+            # Prepared statements don't survive transaction pooling
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+    else:
+        options.update({
+            "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        })
+        # Startup options are rejected by PgBouncer, so only set them when talking to Postgres directly
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            if is_async:
+                connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+            else:
+                connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
@@ -3,6 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.security import decode_access_token
+from app.core.user_cache import UserPrincipal, access_token_revoked, cache_principal, get_cached_principal
 from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -10,7 +11,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
+) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -29,18 +30,39 @@ def get_current_user(
     except (ValueError, TypeError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    # Role and active status come from the users row, never from token claims: the row is
+    # only read on a cache miss (the session connects lazily)
+    principal = get_cached_principal(user_id)
+    if principal is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            raise credentials_exception
+        principal = cache_principal(user)
+    if access_token_revoked(principal, payload.get("iat")):
         raise credentials_exception
-    return user
+    return principal
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def get_current_active_user_model(
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """Full ORM row for handlers that return or modify the user itself (profile, /me)."""
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
 def require_role(required_role: str):
-    def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
+    def role_checker(current_user: UserPrincipal = Depends(get_current_active_user)) -> UserPrincipal:
         if current_user.role != required_role and current_user.role != "admin":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -49,11 +71,16 @@ def require_role(required_role: str):
         return current_user
     return role_checker
 
-def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
-    if current_user.role != "admin":
+def require_admin(
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> UserPrincipal:
+    # Admin rights are re-read from the row, not the principal cache, so a demotion or
+    # deactivation takes effect on the very next admin request in every process
+    row = db.query(User.role, User.is_active).filter(User.id == current_user.id).first()
+    if row is None or not row.is_active or row.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Requires admin role"
         )
     return current_user
-
@@ -0,0 +1,39 @@
+"""
+Per-user entitlement cache: the set of course ids a user is enrolled in (status "enrolled"),
+so lesson access checks don't query enrollments per lesson or per request.
+Writes that grant or revoke an enrollment (enroll, payment verify, refund) call
+invalidate_entitlements() after committing. Per worker process; other workers converge
+within ENTITLEMENT_CACHE_TTL_SECONDS.
+"""
+import time
+from typing import FrozenSet
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.course import Enrollment
+
+_entitlements = TTLCache(settings.USER_CACHE_MAX_ENTRIES, settings.ENTITLEMENT_CACHE_TTL_SECONDS)
+# When each user was last invalidated, so a load that raced an invalidation isn't cached
+_invalidated_at = TTLCache(settings.USER_CACHE_MAX_ENTRIES, settings.ENTITLEMENT_CACHE_TTL_SECONDS)
+
+
+def enrolled_course_ids(db: Session, user_id: int) -> FrozenSet[int]:
+    cached = _entitlements.get(user_id)
+    if cached is not None:
+        return cached
+    started = time.monotonic()
+    course_ids = frozenset(db.scalars(
+        select(Enrollment.course_id).where(Enrollment.user_id == user_id, Enrollment.status == "enrolled")
+    ))
+    invalidated = _invalidated_at.get(user_id)
+    if invalidated is None or invalidated < started:
+        _entitlements.set(user_id, course_ids)
+    return course_ids
+
+
+def invalidate_entitlements(user_id: int) -> None:
+    _invalidated_at.set(user_id, time.monotonic())
+    _entitlements.delete(user_id)
@@ -0,0 +1,212 @@
+"""
+In-process Prometheus metrics, rendered in the text exposition format on GET /metrics.
+
+MetricsMiddleware (pure ASGI, so streaming responses pass through untouched) records per
+route template: request count by status, a latency histogram, requests in flight, and
+how many DB queries the request ran and for how long. Query counts come from cursor
+events on both engines and are attributed to the request through a context variable.
+Video bytes are counted as /api/video/stream and /api/video/hls bodies are sent. With
+VIDEO_ACCEL_REDIRECT_LOCATION set, nginx sends the file, so those bytes are not counted.
+
+Latency quantiles (p50/p95/p99) come from the histogram buckets, e.g.
+histogram_quantile(0.95, sum by (le, route) (rate(http_request_duration_seconds_bucket[5m]))).
+Metrics are per worker process. Prometheus scrapes each process it can reach; run one worker
+per container (or scrape per pod) to see all of them.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+VIDEO_BYTES_PREFIXES = ("/api/video/stream/", "/api/video/hls/")
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._values.items())
+        lines = self._header()
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="%s"' % _format_number(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template, method and status.",
+                   ("method", "route", "status"))
+LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route template.",
+                    ("method", "route"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+DB_QUERIES = Histogram("http_request_db_queries", "DB queries executed per HTTP request.",
+                       ("method", "route"), buckets=QUERY_COUNT_BUCKETS)
+DB_TIME = Histogram("http_request_db_seconds", "Time spent in DB queries per HTTP request.",
+                    ("method", "route"))
+DB_QUERIES_TOTAL = Counter("db_queries_total", "DB queries executed, by engine.", ("engine",))
+VIDEO_BYTES = Counter("video_bytes_sent_total", "Video bytes sent from the app by route template.", ("route",))
+
+REGISTRY = (REQUESTS, LATENCY, IN_FLIGHT, DB_QUERIES, DB_TIME, DB_QUERIES_TOTAL, VIDEO_BYTES)
+
+
+class _RequestDbStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+_request_db: ContextVar[Optional[_RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def instrument_engine(sync_engine, name: str) -> None:
+    """Count queries on `sync_engine` (pass async_engine.sync_engine for the async one)."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        DB_QUERIES_TOTAL.inc((name,))
+        stats = _request_db.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += time.perf_counter() - started
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = _RequestDbStats()
+        token = _request_db.set(stats)
+        status_code = [500]
+        video_bytes = [0]
+        is_video = scope.get("path", "").startswith(VIDEO_BYTES_PREFIXES)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            elif is_video and message["type"] == "http.response.body":
+                video_bytes[0] += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            _request_db.reset(token)
+            # FastAPI puts the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            REQUESTS.inc((method, route, str(status_code[0])))
+            LATENCY.observe(time.perf_counter() - started, (method, route))
+            DB_QUERIES.observe(stats.queries, (method, route))
+            DB_TIME.observe(stats.seconds, (method, route))
+            if video_bytes[0]:
+                VIDEO_BYTES.inc((route,), video_bytes[0])
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
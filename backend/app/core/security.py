@@ -1,9 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import bcrypt
+import hashlib
+import hmac
+import asyncio
 import logging
+import threading
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -46,12 +52,68 @@ def get_password_hash(password: str) -> str:
     
     # Use bcrypt directly to hash the bytes, then format as passlib-compatible hash
     # Generate salt and hash
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     
     # Return as string (passlib format: $2b$rounds$salt+hash)
     return hashed.decode('utf-8')
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the stored hash was made with a different cost than BCRYPT_ROUNDS."""
+    # $2b$12$<salt+hash>
+    parts = (hashed_password or "").split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return False
+    return int(parts[2]) != settings.BCRYPT_ROUNDS
+
+
+class PasswordHashingBusy(HTTPException):
+    """Raised when the bcrypt pool is saturated; surfaces as 503 so clients back off."""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in requests right now. Please try again in a moment.",
+            headers={"Retry-After": "1"},
+        )
+
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop.
+# _hash_pending counts running + queued calls; past the limit we shed load instead of queueing.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+_hash_lock = threading.Lock()
+
+
+async def _run_in_hash_pool(fn, *args):
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+            raise PasswordHashingBusy()
+        _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        with _hash_lock:
+            _hash_pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+def shutdown_hash_pool() -> None:
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+def access_token_claims(user) -> dict:
+    """Claims for a user's access token. Role and active status are left out on purpose:
+    get_current_user reads them from the users row (through the principal cache)."""
+    return {"sub": user.id}
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     # Convert user_id to string (JWT sub claim must be string)
@@ -62,7 +124,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -80,3 +142,27 @@ def decode_access_token(token: str):
         logger.error(f"Error converting user_id: {str(e)}")
         return None
 
+
+def _video_stream_key() -> str:
+    # Derived key so a stream token can never be replayed as an access token (and vice versa)
+    return hmac.new(settings.SECRET_KEY.encode(), b"video-stream", hashlib.sha256).hexdigest()
+
+def create_video_stream_token(video_id: int, user_id: int, expires_delta: Optional[timedelta] = None):
+    """Sign (video id, user id, expiry) so streaming can be served without auth checks.
+    The payload is readable by whoever holds the URL, so it carries no server paths."""
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=settings.VIDEO_STREAM_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + expires_delta
+    to_encode = {"vid": video_id, "sub": str(user_id), "exp": expire}
+    return jwt.encode(to_encode, _video_stream_key(), algorithm=settings.ALGORITHM), expire
+
+def decode_video_stream_token(token: str, video_id: int):
+    """Return the token payload if the signature is valid, unexpired and issued for `video_id`."""
+    try:
+        payload = jwt.decode(token, _video_stream_key(), algorithms=[settings.ALGORITHM])
+    except JWTError as e:
+        logger.warning(f"Video stream token rejected: {str(e)}")
+        return None
+    if payload.get("vid") != video_id:
+        return None
+    return payload
@@ -0,0 +1,61 @@
+"""
+Short-TTL cache of authenticated user principals (id, role, is_active, email,
+tokens_valid_after), keyed by user id, so get_current_user doesn't SELECT the users row
+on every request. Writes that change these fields (profile update, password reset, admin
+status change) call invalidate_user(). Per worker process; other workers converge within
+USER_CACHE_TTL_SECONDS.
+
+Access tokens are revoked durably: revoke_access_tokens() sets users.tokens_valid_after,
+and get_current_user rejects tokens issued before it, so a deactivation or demotion
+survives restarts and reaches every process within one cache TTL.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import func, update
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    id: int
+    role: str
+    is_active: bool
+    email: Optional[str] = None
+    tokens_valid_after: Optional[int] = None  # epoch seconds
+
+
+_principals = TTLCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+
+
+def get_cached_principal(user_id: int) -> Optional[UserPrincipal]:
+    return _principals.get(user_id)
+
+
+def cache_principal(user) -> UserPrincipal:
+    principal = UserPrincipal(
+        id=user.id, role=user.role, is_active=bool(user.is_active), email=user.email,
+        tokens_valid_after=int(user.tokens_valid_after.timestamp()) if user.tokens_valid_after else None,
+    )
+    _principals.set(user.id, principal)
+    return principal
+
+
+def invalidate_user(user_id: int) -> None:
+    _principals.delete(user_id)
+
+
+def revoke_access_tokens(user_id: int):
+    """Statement rejecting access tokens issued to `user_id` before now (role change, deactivation,
+    password reset). Execute it in the caller's transaction, then invalidate_user() after commit."""
+    return update(User).where(User.id == user_id).values(tokens_valid_after=func.now())
+
+
+def access_token_revoked(principal: UserPrincipal, issued_at) -> bool:
+    if principal.tokens_valid_after is None:
+        return False
+    # iat has whole-second resolution; a token minted in the revocation second itself is kept
+    return not isinstance(issued_at, (int, float)) or issued_at < principal.tokens_valid_after
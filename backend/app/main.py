@@ -1,10 +1,15 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
+import hmac
 import logging
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, Base
+from app.core.security import shutdown_hash_pool
+from app.services.payment_gateway import shutdown_gateway_pool
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.pagination import NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER
 from app.routers import auth, users, courses, payments, content, live_classes, notes, roadmaps, certifications, career, testimonials, onboarding, admin, video, dashboard, calendar
 
 logging.basicConfig(
@@ -31,7 +36,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER],
 )
+if settings.METRICS_ENABLED:
+    if settings.ENVIRONMENT == "production" and not settings.METRICS_TOKEN:
+        raise RuntimeError("METRICS_ENABLED needs METRICS_TOKEN in production (the metrics expose routes and traffic)")
+    app.add_middleware(MetricsMiddleware)
+
+@app.on_event("shutdown")
+async def release_resources():
+    await async_engine.dispose()
+    shutdown_hash_pool()
+    shutdown_gateway_pool()
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -97,3 +113,15 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint: per-route latency/status, in-flight requests, DB queries per request, video bytes."""
+    if not settings.METRICS_ENABLED:
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Not Found"})
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        # Bytes: compare_digest rejects non-ASCII str, which a client controls here
+        if not hmac.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode()):
+            return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED, content={"detail": "Not authenticated"})
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
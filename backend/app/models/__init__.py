@@ -1,16 +1,22 @@
 from app.models.user import User
 from app.models.password_reset import PasswordResetToken
+from app.models.refresh_token import RefreshToken
 from app.models.course import Course, Lesson, Module, Enrollment
-from app.models.payment import Payment
-from app.models.content import VideoContent
+from app.models.payment import Payment, ProcessedWebhookEvent
+from app.models.content import VideoContent, VideoUpload, VideoJob
 from app.models.live_class import LiveClass, LiveClassAttendee
+from app.models.calendar_sync import CalendarSyncState, CalendarSyncRun
 from app.models.note import Note
 from app.models.roadmap import Roadmap
 from app.models.certification import Certification
 from app.models.career import InterviewPrep, Resume, ClientConnection
 from app.models.testimonial import Testimonial
 from app.models.onboarding import OnboardingStep
-from app.models.analytics import CourseView, UserEngagement
+from app.models.analytics import (
+    CourseView, UserEngagement, CourseStatsDaily, EngagementStatsDaily, SignupStatsDaily, AnalyticsWatermark,
+)
+from app.models.dashboard_summary import UserDashboardSummary
+from app.models.outbox import OutboxEvent
 
 
 
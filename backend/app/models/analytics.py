@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Date, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class CourseView(Base):
     __tablename__ = "course_views"
+    __table_args__ = (
+        Index("ix_course_views_viewed_at", "viewed_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
@@ -16,6 +19,9 @@ class CourseView(Base):
 
 class UserEngagement(Base):
     __tablename__ = "user_engagements"
+    __table_args__ = (
+        Index("ix_user_engagements_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -26,4 +32,39 @@ class UserEngagement(Base):
     user = relationship("User")
 
 
+# Daily rollups (UTC days), maintained by services/analytics_rollups.py
+
+class CourseStatsDaily(Base):
+    __tablename__ = "course_stats_daily"
+
+    day = Column(Date, primary_key=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True, index=True)
+    views = Column(Integer, nullable=False, default=0)
+    unique_viewers = Column(Integer, nullable=False, default=0)
+    enrollments = Column(Integer, nullable=False, default=0)
+    payments = Column(Integer, nullable=False, default=0)  # orders created that day, any status
+    completed_payments = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)  # completed payments, by order day
+
+class EngagementStatsDaily(Base):
+    __tablename__ = "engagement_stats_daily"
+
+    day = Column(Date, primary_key=True)
+    engagement_type = Column(String, primary_key=True)
+    events = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+
+class SignupStatsDaily(Base):
+    __tablename__ = "signup_stats_daily"
+
+    day = Column(Date, primary_key=True)
+    signups = Column(Integer, nullable=False, default=0)
+
+class AnalyticsWatermark(Base):
+    """Upper bound of source timestamps already folded into the rollups."""
+    __tablename__ = "analytics_watermarks"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
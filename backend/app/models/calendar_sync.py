@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CalendarSyncState(Base):
+    """Google Calendar nextSyncToken per calendar, so each sync only fetches changed events."""
+    __tablename__ = "calendar_sync_state"
+
+    calendar_id = Column(String, primary_key=True)
+    sync_token = Column(String, nullable=True)
+    last_full_sync_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class CalendarSyncRun(Base):
+    """One calendar sync: queued by the admin endpoint or the scheduler, executed by the calendar worker."""
+    __tablename__ = "calendar_sync_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trigger = Column(String, nullable=False, default="schedule")  # schedule | manual
+    requested_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    status = Column(String, nullable=False, default="pending", index=True)  # pending | running | succeeded | failed
+    full_sync = Column(Boolean, nullable=True)
+    events_seen = Column(Integer, nullable=True)
+    created = Column(Integer, nullable=True)
+    updated = Column(Integer, nullable=True)
+    deleted = Column(Integer, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -11,11 +11,40 @@ class VideoContent(Base):
     title = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     file_size = Column(Integer, nullable=True)
+    content_hash = Column(String, nullable=True, index=True)  # sha256 hex; file is stored as VIDEO_DIR/<hash><ext>
     duration = Column(Integer, nullable=True)
     thumbnail_url = Column(String, nullable=True)
+    hls_playlist_path = Column(String, nullable=True)  # master.m3u8 written by the processing worker
+    processing_status = Column(String, nullable=True)  # pending, processing, ready, failed
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     lesson = relationship("Lesson")
 
+class VideoUpload(Base):
+    """Resumable upload session. Chunks are appended to a temp file until received_bytes == total_size."""
+    __tablename__ = "video_uploads"
 
+    id = Column(String, primary_key=True)  # opaque upload id handed to the client
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=True)
+    filename = Column(String, nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    received_bytes = Column(BigInteger, nullable=False, default=0)
+    status = Column(String, nullable=False, default="uploading")  # uploading, completed
+    video_content_id = Column(Integer, ForeignKey("video_contents.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class VideoJob(Base):
+    """DB-backed work queue for the video processing worker (probe, thumbnail, HLS)."""
+    __tablename__ = "video_jobs"
 
+    id = Column(Integer, primary_key=True, index=True)
+    video_content_id = Column(Integer, ForeignKey("video_contents.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending", index=True)  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime(timezone=True), server_default=func.now())
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
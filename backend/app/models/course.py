@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -19,13 +19,19 @@ class Course(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
-    modules = relationship("Module", back_populates="course", cascade="all, delete-orphan")
+    modules = relationship(
+        "Module", back_populates="course", cascade="all, delete-orphan",
+        order_by=lambda: (Module.order_index, Module.id)
+    )
     enrollments = relationship("Enrollment", back_populates="course")
     testimonials = relationship("Testimonial", back_populates="course")
     live_classes = relationship("LiveClass", back_populates="course")
 
 class Module(Base):
     __tablename__ = "modules"
+    __table_args__ = (
+        Index("ix_modules_course_id_order_index", "course_id", "order_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
@@ -36,10 +42,16 @@ class Module(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     course = relationship("Course", back_populates="modules")
-    lessons = relationship("Lesson", back_populates="module", cascade="all, delete-orphan")
+    lessons = relationship(
+        "Lesson", back_populates="module", cascade="all, delete-orphan",
+        order_by=lambda: (Lesson.order_index, Lesson.id)
+    )
 
 class Lesson(Base):
     __tablename__ = "lessons"
+    __table_args__ = (
+        Index("ix_lessons_module_id_order_index", "module_id", "order_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     module_id = Column(Integer, ForeignKey("modules.id"), nullable=False)
@@ -57,6 +69,11 @@ class Lesson(Base):
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        Index("ix_enrollments_user_id_course_id", "user_id", "course_id", unique=True),
+        Index("ix_enrollments_course_id", "course_id"),
+        Index("ix_enrollments_purchased_at", "purchased_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class UserDashboardSummary(Base):
+    """Per-user rollup behind GET /api/dashboard/summary (see services/dashboard_summary.py)."""
+    __tablename__ = "user_dashboard_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    enrollments_count = Column(Integer, nullable=False, default=0)
+    total_paid = Column(Float, nullable=False, default=0.0)
+    upcoming_live_classes_count = Column(Integer, nullable=False, default=0)
+    recorded_classes_count = Column(Integer, nullable=False, default=0)
+    # Upcoming count changes by itself when the next class starts; recompute at this time
+    valid_until = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -7,6 +7,9 @@ from app.core.database import Base
 class LiveClassAttendee(Base):
     """Calendar/invite attendees per live class. Used so candidates see VSA invites in LMS across domains."""
     __tablename__ = "live_class_attendees"
+    __table_args__ = (
+        Index("ix_live_class_attendees_live_class_id_email", "live_class_id", "email", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     live_class_id = Column(Integer, ForeignKey("live_classes.id", ondelete="CASCADE"), nullable=False)
@@ -17,6 +20,10 @@ class LiveClassAttendee(Base):
 
 class LiveClass(Base):
     __tablename__ = "live_classes"
+    __table_args__ = (
+        Index("ix_live_classes_course_id_scheduled_at", "course_id", "scheduled_at"),
+        Index("ix_live_classes_scheduled_at", "scheduled_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_user_id_status", "user_id", "status"),
+        Index("ix_payments_course_id", "course_id"),
+        Index("ix_payments_created_at", "created_at"),
+        Index("ix_payments_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -23,5 +29,10 @@ class Payment(Base):
     user = relationship("User", back_populates="payments")
     course = relationship("Course")
 
+class ProcessedWebhookEvent(Base):
+    """Razorpay webhook deliveries already applied, keyed by X-Razorpay-Event-Id."""
+    __tablename__ = "processed_webhook_events"
 
-
+    event_id = Column(String, primary_key=True)
+    event = Column(String, nullable=False)
+    processed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,22 +1,33 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.core.database import Base
 
+
+def normalize_phone(phone: str) -> str:
+    """Digits-only form of a phone number, used for indexed lookups (e.g. '+91 98765-43210' -> '919876543210')."""
+    return "".join(c for c in (phone or "") if c.isdigit())
+
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=True)
     password_hash = Column(String, nullable=False)
     full_name = Column(String, nullable=True)
     phone = Column(String, nullable=True)
+    phone_normalized = Column(String, unique=True, index=True, nullable=True)  # kept in sync with phone
     role = Column(String, default="prospect")
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     profile_data = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    tokens_valid_after = Column(DateTime(timezone=True), nullable=True)  # access tokens issued earlier are rejected
 
     enrollments = relationship("Enrollment", back_populates="user")
     payments = relationship("Payment", back_populates="user")
@@ -26,3 +37,7 @@ class User(Base):
     resumes = relationship("Resume", back_populates="user")
     onboarding_steps = relationship("OnboardingStep", back_populates="user")
 
+    @validates("phone")
+    def _sync_phone_normalized(self, key, value):
+        self.phone_normalized = normalize_phone(value) or None
+        return value
@@ -1,67 +1,342 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Dict, Any
-from app.core.database import get_db
+from sqlalchemy import func, or_, select
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.core.database import get_db, engine, async_engine
+from app.core.db_pool import sync_pool_metrics, async_pool_metrics
 from app.core.dependencies import require_admin
+from app.core.pagination import NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER, decode_cursor, encode_cursor, estimate_count
+from app.core.user_cache import UserPrincipal, invalidate_user, revoke_access_tokens
 from app.models.user import User
 from app.models.course import Course, Enrollment
 from app.models.payment import Payment
-from app.models.analytics import CourseView, UserEngagement
-from app.schemas.user import UserResponse
+from app.models.outbox import OutboxEvent
+from app.models.analytics import CourseStatsDaily, CourseView, EngagementStatsDaily, SignupStatsDaily, UserEngagement
+from app.schemas.user import UserResponse, AdminUserUpdate
+from app.schemas.payment import AdminPaymentResponse
+from app.schemas.analytics import (
+    CourseViewResponse, CourseStatsDailyResponse, CourseStatsTotalResponse, EngagementStatsDailyResponse,
+)
+from app.services.analytics_rollups import rollup_watermark
+from app.services.exports import export_response
+from app.services.payment_gateway import gateway_status
+from app.services.refresh_tokens import revoke_user_refresh_tokens
 
 router = APIRouter()
 
+def _page(db: Session, response: Response, stmt, id_column, limit: int, cursor: Optional[str]):
+    """Newest-first keyset page on `id_column`; sets X-Next-Cursor and X-Total-Count-Estimate."""
+    response.headers[TOTAL_ESTIMATE_HEADER] = str(estimate_count(db, stmt))
+    if cursor:
+        (before_id,) = decode_cursor(cursor, (int,))
+        stmt = stmt.where(id_column < before_id)
+    rows = db.scalars(stmt.order_by(id_column.desc()).limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([rows[-1].id])
+    return rows
+
+def _users_query(role: Optional[str], is_active: Optional[bool],
+                 created_from: Optional[datetime], created_to: Optional[datetime]):
+    stmt = select(User)
+    if role:
+        stmt = stmt.where(User.role == role)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if created_from:
+        stmt = stmt.where(User.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(User.created_at < created_to)
+    return stmt
+
+def _payments_query(status_filter: Optional[str], course_id: Optional[int], user_id: Optional[int],
+                    created_from: Optional[datetime], created_to: Optional[datetime], stmt=None):
+    stmt = select(Payment) if stmt is None else stmt
+    if status_filter:
+        stmt = stmt.where(Payment.status == status_filter)
+    if course_id:
+        stmt = stmt.where(Payment.course_id == course_id)
+    if user_id:
+        stmt = stmt.where(Payment.user_id == user_id)
+    if created_from:
+        stmt = stmt.where(Payment.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Payment.created_at < created_to)
+    return stmt
+
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(require_admin),
+    response: Response,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Newest users first. Pass the X-Next-Cursor header back as `cursor` for the next page."""
+    stmt = _users_query(role, is_active, created_from, created_to)
+    return _page(db, response, stmt, User.id, limit, cursor)
+
+@router.get("/users/export")
+async def export_users(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: UserPrincipal = Depends(require_admin),
+):
+    columns = ["id", "email", "full_name", "phone", "role", "is_active", "is_verified", "created_at"]
+    stmt = _users_query(role, is_active, created_from, created_to).with_only_columns(
+        *(getattr(User, c) for c in columns)
+    ).order_by(User.id)
+    return export_response(stmt, columns, format, "users")
+
+@router.put("/users/{user_id}", response_model=UserResponse)
+async def update_user_access(
+    user_id: int,
+    body: AdminUserUpdate,
+    current_user: UserPrincipal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if body.role is not None:
+        user.role = body.role
+    if body.is_active is not None:
+        user.is_active = body.is_active
+        if not body.is_active:
+            db.execute(revoke_user_refresh_tokens(user.id))
+    # Make clients refresh so every token they hold reflects the change
+    db.execute(revoke_access_tokens(user.id))
+    db.commit()
+    invalidate_user(user.id)
+    db.refresh(user)
+    return user
+
+def _day_start(value: datetime) -> datetime:
+    return datetime.combine(value.astimezone(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+
+def _rollup_totals(db: Session, as_of: datetime):
+    """
+    Rollup sums for whole UTC days before `cutoff` plus raw rows from `cutoff` on (one indexed
+    range query per table). The watermark's own day may hold rows newer than the watermark, and
+    a payment whose status changed after it is stale on its order day, so both start raw.
+    """
+    cutoff = _day_start(as_of)
+    users = db.query(func.coalesce(func.sum(SignupStatsDaily.signups), 0)).filter(
+        SignupStatsDaily.day < cutoff.date()
+    ).scalar() + db.query(func.count(User.id)).filter(User.created_at >= cutoff).scalar()
+
+    enrollments = db.query(func.coalesce(func.sum(CourseStatsDaily.enrollments), 0)).filter(
+        CourseStatsDaily.day < cutoff.date()
+    ).scalar() + db.query(func.count(Enrollment.id)).filter(Enrollment.purchased_at >= cutoff).scalar()
+
+    changed_since = db.query(func.min(Payment.created_at)).filter(Payment.updated_at > as_of).scalar()
+    if changed_since is not None:
+        cutoff = min(cutoff, _day_start(changed_since))
+    completed = Payment.status == "completed"
+    rolled_payments, rolled_revenue = db.query(
+        func.coalesce(func.sum(CourseStatsDaily.payments), 0),
+        func.coalesce(func.sum(CourseStatsDaily.revenue), 0),
+    ).filter(CourseStatsDaily.day < cutoff.date()).one()
+    # Payments without a course are never rolled up
+    raw_payments, raw_revenue = db.query(
+        func.count(Payment.id),
+        func.coalesce(func.sum(Payment.amount).filter(completed), 0),
+    ).filter(or_(Payment.created_at >= cutoff, Payment.course_id.is_(None))).one()
+    return users, enrollments, rolled_payments + raw_payments, rolled_revenue + raw_revenue
 
 @router.get("/stats")
 async def get_admin_stats(
-    current_user: User = Depends(require_admin),
+    current_user: UserPrincipal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    total_users = db.query(func.count(User.id)).scalar()
+    """
+    Platform totals. Once the analytics worker has run, enrollment/payment/user totals come
+    from the daily rollups for the days before the watermark (`as_of`) plus the raw rows from
+    then on, so they match a full count of the raw tables.
+    """
     total_courses = db.query(func.count(Course.id)).scalar()
-    total_enrollments = db.query(func.count(Enrollment.id)).scalar()
-    total_payments = db.query(func.count(Payment.id)).scalar()
-    total_revenue = db.query(func.sum(Payment.amount)).filter(Payment.status == "completed").scalar() or 0
-    
+    as_of = rollup_watermark(db)
+    if as_of is None:
+        total_users = db.query(func.count(User.id)).scalar()
+        total_enrollments = db.query(func.count(Enrollment.id)).scalar()
+        total_payments = db.query(func.count(Payment.id)).scalar()
+        total_revenue = db.query(func.sum(Payment.amount)).filter(Payment.status == "completed").scalar() or 0
+    else:
+        total_users, total_enrollments, total_payments, total_revenue = _rollup_totals(db, as_of)
+
     return {
         "total_users": total_users,
         "total_courses": total_courses,
         "total_enrollments": total_enrollments,
         "total_payments": total_payments,
-        "total_revenue": total_revenue
+        "total_revenue": total_revenue,
+        "as_of": as_of,
     }
 
-@router.get("/payments")
+def _day_range(date_from: Optional[date], date_to: Optional[date]):
+    """Inclusive UTC day range, defaulting to the last 30 days."""
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    if (date_to - date_from).days > 366:
+        raise HTTPException(status_code=400, detail="Date range is limited to 366 days")
+    return date_from, date_to
+
+@router.get("/analytics/courses/daily", response_model=List[CourseStatsDailyResponse])
+async def get_course_stats_daily(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    course_id: Optional[int] = None,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Per-course daily views, enrollments and payments from the rollups (UTC days, inclusive)."""
+    date_from, date_to = _day_range(date_from, date_to)
+    query = db.query(CourseStatsDaily).filter(CourseStatsDaily.day >= date_from, CourseStatsDaily.day <= date_to)
+    if course_id:
+        query = query.filter(CourseStatsDaily.course_id == course_id)
+    return query.order_by(CourseStatsDaily.day, CourseStatsDaily.course_id).all()
+
+@router.get("/analytics/courses/totals", response_model=List[CourseStatsTotalResponse])
+async def get_course_stats_totals(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Per-course totals over a day range, busiest first. Unique viewers are per day only, so not summed here."""
+    date_from, date_to = _day_range(date_from, date_to)
+    rows = db.query(
+        CourseStatsDaily.course_id,
+        func.sum(CourseStatsDaily.views).label("views"),
+        func.sum(CourseStatsDaily.enrollments).label("enrollments"),
+        func.sum(CourseStatsDaily.payments).label("payments"),
+        func.sum(CourseStatsDaily.completed_payments).label("completed_payments"),
+        func.sum(CourseStatsDaily.revenue).label("revenue"),
+    ).filter(
+        CourseStatsDaily.day >= date_from, CourseStatsDaily.day <= date_to
+    ).group_by(CourseStatsDaily.course_id).order_by(func.sum(CourseStatsDaily.views).desc()).all()
+    return [CourseStatsTotalResponse(**row._asdict()) for row in rows]
+
+@router.get("/analytics/engagement", response_model=List[EngagementStatsDailyResponse])
+async def get_engagement_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    engagement_type: Optional[str] = None,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Daily engagement events and unique users per engagement type from the rollups."""
+    date_from, date_to = _day_range(date_from, date_to)
+    query = db.query(EngagementStatsDaily).filter(
+        EngagementStatsDaily.day >= date_from, EngagementStatsDaily.day <= date_to
+    )
+    if engagement_type:
+        query = query.filter(EngagementStatsDaily.engagement_type == engagement_type)
+    return query.order_by(EngagementStatsDaily.day, EngagementStatsDaily.engagement_type).all()
+
+@router.get("/payments", response_model=List[AdminPaymentResponse])
 async def get_all_payments(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(require_admin),
+    response: Response,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    course_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Newest payments first. Pass the X-Next-Cursor header back as `cursor` for the next page."""
+    stmt = _payments_query(status_filter, course_id, user_id, created_from, created_to)
+    return _page(db, response, stmt, Payment.id, limit, cursor)
+
+@router.get("/payments/export")
+async def export_payments(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    course_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: UserPrincipal = Depends(require_admin),
+):
+    """Full (filtered) payments table as CSV or NDJSON, streamed with a server-side cursor."""
+    columns = [
+        "id", "user_id", "course_id", "amount", "currency", "status", "payment_method",
+        "razorpay_order_id", "razorpay_payment_id", "failure_reason", "created_at", "updated_at",
+    ]
+    stmt = _payments_query(
+        status_filter, course_id, user_id, created_from, created_to,
+        stmt=select(*(getattr(Payment, c) for c in columns)),
+    ).order_by(Payment.id)
+    return export_response(stmt, columns, format, "payments")
+
+@router.get("/payments/gateway")
+async def get_payment_gateway_status(current_user: UserPrincipal = Depends(require_admin)):
+    """Gateway circuit state, in-flight calls and per-operation latency/error counters for this worker process."""
+    return {"pid": os.getpid(), **gateway_status()}
+
+@router.get("/outbox")
+async def get_outbox_status(
+    current_user: UserPrincipal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    payments = db.query(Payment).offset(skip).limit(limit).all()
-    return payments
+    """Outbox backlog: events per status, the oldest pending one, and the latest failures."""
+    counts = dict(db.query(OutboxEvent.status, func.count()).group_by(OutboxEvent.status).all())
+    oldest_pending = db.query(func.min(OutboxEvent.created_at)).filter(OutboxEvent.status == "pending").scalar()
+    failed = db.query(OutboxEvent).filter(OutboxEvent.status == "failed").order_by(OutboxEvent.id.desc()).limit(20).all()
+    return {
+        "counts": counts,
+        "oldest_pending_at": oldest_pending,
+        "failed": [
+            {"id": e.id, "event_type": e.event_type, "attempts": e.attempts, "last_error": e.last_error,
+             "created_at": e.created_at}
+            for e in failed
+        ],
+    }
 
-@router.get("/analytics/course-views")
+@router.get("/analytics/course-views", response_model=List[CourseViewResponse])
 async def get_course_views_analytics(
+    response: Response,
     course_id: int = None,
-    current_user: User = Depends(require_admin),
+    user_id: Optional[int] = None,
+    viewed_from: Optional[datetime] = None,
+    viewed_to: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    current_user: UserPrincipal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    query = db.query(CourseView)
+    stmt = select(CourseView)
     if course_id:
-        query = query.filter(CourseView.course_id == course_id)
-    views = query.all()
-    return views
-
-
+        stmt = stmt.where(CourseView.course_id == course_id)
+    if user_id:
+        stmt = stmt.where(CourseView.user_id == user_id)
+    if viewed_from:
+        stmt = stmt.where(CourseView.viewed_at >= viewed_from)
+    if viewed_to:
+        stmt = stmt.where(CourseView.viewed_at < viewed_to)
+    return _page(db, response, stmt, CourseView.id, limit, cursor)
 
+@router.get("/db/pool")
+async def get_db_pool_metrics(current_user: UserPrincipal = Depends(require_admin)):
+    """Connection pool checkouts, overflow, checkout wait and connection age for this worker process."""
+    return {
+        "pid": os.getpid(),
+        "pgbouncer_mode": settings.DB_PGBOUNCER_MODE,
+        "sync": sync_pool_metrics.snapshot(engine.pool),
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine.pool),
+    }
@@ -1,41 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from datetime import timedelta, datetime, timezone
 import hashlib
 import secrets
 import logging
-from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.database import get_async_db
+from app.core.security import (
+    verify_password_async, get_password_hash_async, password_needs_rehash, create_access_token,
+    access_token_claims,
+)
 from app.core.config import settings
-from app.core.dependencies import get_current_active_user
+from app.core.dependencies import get_current_active_user_model
+from app.core.user_cache import invalidate_user, revoke_access_tokens
 from app.core.firebase import verify_firebase_id_token
-from app.models.user import User
+from app.models.user import User, normalize_phone
 from app.models.password_reset import PasswordResetToken
-from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, VerifyPhoneRequest, RegisterResponse, ForgotPasswordRequest, ResetPasswordRequest
+from app.services.refresh_tokens import (
+    InvalidRefreshToken, issue_refresh_token, revoke_refresh_token, revoke_user_refresh_tokens, rotate_refresh_token,
+)
+from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, VerifyPhoneRequest, RegisterResponse, ForgotPasswordRequest, ResetPasswordRequest, RefreshTokenRequest
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-def _digits_only(s: str) -> str:
-    return "".join(c for c in (s or "") if c.isdigit())
-
 @router.post("/register", response_model=RegisterResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         logger.info(f"Registration attempt: phone={user_data.phone}, email={user_data.email}")
         if user_data.email:
-            existing = db.query(User).filter(User.email == user_data.email).first()
+            existing = await db.scalar(select(User.id).where(User.email == user_data.email))
             if existing:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-        phone_digits = _digits_only(user_data.phone)
-        users_with_phone = db.query(User).filter(User.phone.isnot(None)).all()
-        if any(_digits_only(u.phone) == phone_digits for u in users_with_phone):
+        phone_digits = normalize_phone(user_data.phone)
+        existing_phone = await db.scalar(select(User.id).where(User.phone_normalized == phone_digits))
+        if existing_phone:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Phone number already registered")
         raw_password = (user_data.password or "").strip()
         if not raw_password:
             raw_password = secrets.token_urlsafe(32)
-        hashed_password = get_password_hash(raw_password)
+        hashed_password = await get_password_hash_async(raw_password)
         new_user = User(
             email=user_data.email or None,
             password_hash=hashed_password,
@@ -44,24 +49,28 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
             role="prospect"
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
+        refresh_token = issue_refresh_token(db, new_user.id)
+        await db.commit()
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(data={"sub": new_user.id}, expires_delta=access_token_expires)
+        access_token = create_access_token(data=access_token_claims(new_user), expires_delta=access_token_expires)
         logger.info(f"User registered: id={new_user.id}, phone={new_user.phone}")
-        return RegisterResponse(user=new_user, access_token=access_token, token_type="bearer")
+        return RegisterResponse(
+            user=new_user, access_token=access_token, token_type="bearer", refresh_token=refresh_token
+        )
     except HTTPException:
         # Re-raise HTTP exceptions (400, 401, etc.) as-is
         raise
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error during registration: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered or database constraint violation"
+            detail="Email or phone number already registered"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         error_type = type(e).__name__
         error_message = str(e)
         logger.error(f"Error during registration - Type: {error_type}, Message: {error_message}", exc_info=True)
@@ -72,9 +81,9 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     try:
-        user = db.query(User).filter(User.email == credentials.email).first()
+        user = await db.scalar(select(User).where(User.email == credentials.email))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -82,7 +91,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
             )
         
         # Verify password (this handles password truncation automatically)
-        if not verify_password(credentials.password, user.password_hash):
+        if not await verify_password_async(credentials.password, user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
@@ -94,12 +103,18 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
                 detail="Inactive user"
             )
         
+        if password_needs_rehash(user.password_hash):
+            # BCRYPT_ROUNDS changed since this hash was made; upgrade it while we have the plaintext
+            user.password_hash = await get_password_hash_async(credentials.password)
+        refresh_token = issue_refresh_token(db, user.id)
+        await db.commit()
+        
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.id}, expires_delta=access_token_expires
+            data=access_token_claims(user), expires_delta=access_token_expires
         )
         logger.info(f"User logged in successfully: {user.email or user.phone}")
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
     except HTTPException:
         raise
     except Exception as e:
@@ -110,7 +125,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
 
 @router.post("/verify-phone", response_model=Token)
-async def verify_phone(payload: VerifyPhoneRequest, db: Session = Depends(get_db)):
+async def verify_phone(payload: VerifyPhoneRequest, db: AsyncSession = Depends(get_async_db)):
     """Verify Firebase phone ID token and return our JWT. User must already be registered with this phone."""
     phone = verify_firebase_id_token(payload.id_token)
     if not phone:
@@ -118,12 +133,9 @@ async def verify_phone(payload: VerifyPhoneRequest, db: Session = Depends(get_db
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired verification code. Please try again."
         )
-    # Find user by phone (normalize to digits for comparison)
-    def digits_only(s: str) -> str:
-        return "".join(c for c in (s or "") if c.isdigit())
-    phone_digits = digits_only(phone)
-    users_with_phone = db.query(User).filter(User.phone.isnot(None)).all()
-    user = next((u for u in users_with_phone if digits_only(u.phone) == phone_digits), None)
+    # Find user by phone (normalized to digits, indexed lookup)
+    phone_digits = normalize_phone(phone)
+    user = await db.scalar(select(User).where(User.phone_normalized == phone_digits)) if phone_digits else None
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -134,51 +146,83 @@ async def verify_phone(payload: VerifyPhoneRequest, db: Session = Depends(get_db
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Account is inactive"
         )
+    refresh_token = issue_refresh_token(db, user.id)
+    await db.commit()
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id}, expires_delta=access_token_expires
+        data=access_token_claims(user), expires_delta=access_token_expires
     )
     logger.info(f"User logged in via phone: {user.phone}")
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(body: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token (and a new refresh token). No password check."""
+    try:
+        user, refresh_token = await rotate_refresh_token(db, body.refresh_token)
+    except InvalidRefreshToken as e:
+        logger.info(f"Refresh rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(data=access_token_claims(user), expires_delta=access_token_expires)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/logout")
+async def logout(body: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
+    """Revoke the refresh token (and its rotation chain). The access token lapses on its own."""
+    await revoke_refresh_token(db, body.refresh_token)
+    return {"message": "Logged out"}
 
 
 @router.post("/forgot-password")
-async def forgot_password(body: ForgotPasswordRequest, db: Session = Depends(get_db)):
+async def forgot_password(body: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     """Request a password reset link. Always returns success to avoid email enumeration."""
-    user = db.query(User).filter(User.email == body.email.strip()).first()
+    user = await db.scalar(select(User).where(User.email == body.email.strip()))
     if not user:
         return {"detail": "If this email is registered, you will receive a reset link shortly."}
     raw_token = secrets.token_urlsafe(32)
     token_hash = hashlib.sha256(raw_token.encode()).hexdigest()
     expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
     db.add(PasswordResetToken(email=user.email, token_hash=token_hash, expires_at=expires_at))
-    db.commit()
+    await db.commit()
     reset_link = f"{getattr(settings, 'FRONTEND_URL', '')}/reset-password?token={raw_token}"
     logger.info(f"Password reset requested for {user.email}. Link: {reset_link}")
     return {"detail": "If this email is registered, you will receive a reset link shortly."}
 
 @router.post("/reset-password")
-async def reset_password(body: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(body: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     """Set new password using the token from the reset link."""
     token_hash = hashlib.sha256(body.token.encode()).hexdigest()
-    row = db.query(PasswordResetToken).filter(
-        PasswordResetToken.token_hash == token_hash,
-        PasswordResetToken.expires_at > datetime.now(timezone.utc)
-    ).first()
+    row = await db.scalar(
+        select(PasswordResetToken).where(
+            PasswordResetToken.token_hash == token_hash,
+            PasswordResetToken.expires_at > datetime.now(timezone.utc)
+        )
+    )
     if not row:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired reset link.")
-    user = db.query(User).filter(User.email == row.email).first()
+    user = await db.scalar(select(User).where(User.email == row.email))
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User not found.")
     if len(body.new_password) < 6:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Password must be at least 6 characters.")
-    user.password_hash = get_password_hash(body.new_password)
-    db.delete(row)
-    db.commit()
+    user.password_hash = await get_password_hash_async(body.new_password)
+    await db.delete(row)
+    # A password reset signs the user out everywhere
+    await db.execute(revoke_user_refresh_tokens(user.id))
+    await db.execute(revoke_access_tokens(user.id))
+    await db.commit()
+    invalidate_user(user.id)
     logger.info(f"Password reset completed for {user.email}")
     return {"detail": "Password has been reset. You can now sign in."}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_active_user_model)):
     return current_user
 
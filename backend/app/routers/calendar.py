@@ -1,48 +1,55 @@
 """
-Google Calendar sync endpoint. Run on a schedule (e.g. cron every 15 min) or manually.
-Requires admin auth when called via API.
+Google Calendar sync endpoints. Syncs run in the calendar worker
+(python -m app.workers.calendar_worker), on its schedule or when queued here.
+Requires admin auth.
 """
 import logging
-from fastapi import APIRouter, Depends
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
 
 from app.core.database import get_db
 from app.core.dependencies import require_admin
-from app.models.user import User
-from app.services.calendar_sync import sync_calendar_to_live_classes
+from app.core.user_cache import UserPrincipal
+from app.models.calendar_sync import CalendarSyncRun
+from app.schemas.calendar import CalendarSyncRunResponse
+from app.services.calendar_runs import request_run
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-class CalendarSyncResponse(BaseModel):
-    created: int
-    updated: int
-    message: str
-
-
-@router.post("/sync", response_model=CalendarSyncResponse)
+@router.post("/sync", response_model=CalendarSyncRunResponse, status_code=status.HTTP_202_ACCEPTED)
 async def sync_calendar(
-    current_user: User = Depends(require_admin),
+    current_user: UserPrincipal = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
-    Sync Google Calendar events to LiveClass table.
-    Uses GOOGLE_CALENDAR_ID and GOOGLE_APPLICATION_CREDENTIALS.
-    Call this periodically (e.g. every 15 min) or after updating the calendar.
+    Queue a Google Calendar -> LiveClass sync and return the run. If a run is already
+    pending or running, that run is returned instead. Poll GET /sync/runs/{id} for the result.
     """
-    try:
-        created, updated = sync_calendar_to_live_classes(db)
-        return CalendarSyncResponse(
-            created=created,
-            updated=updated,
-            message=f"Synced: {created} created, {updated} updated.",
-        )
-    except ValueError as e:
-        logger.warning("Calendar sync skipped: %s", e)
-        return CalendarSyncResponse(created=0, updated=0, message=str(e))
-    except Exception as e:
-        logger.exception("Calendar sync failed: %s", e)
-        raise
+    run = request_run(db, trigger="manual", requested_by=current_user.id)
+    logger.info("Calendar sync run %s queued by user %s (status=%s)", run.id, current_user.id, run.status)
+    return run
+
+
+@router.get("/sync/runs", response_model=List[CalendarSyncRunResponse])
+async def list_sync_runs(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: UserPrincipal = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    return db.query(CalendarSyncRun).order_by(CalendarSyncRun.id.desc()).limit(limit).all()
+
+
+@router.get("/sync/runs/{run_id}", response_model=CalendarSyncRunResponse)
+async def get_sync_run(
+    run_id: int,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    run = db.query(CalendarSyncRun).filter(CalendarSyncRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Sync run not found")
+    return run
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user
-from app.models.user import User
+from app.core.user_cache import UserPrincipal
 from app.models.career import InterviewPrep, Resume, ClientConnection
 from app.schemas.career import (
     InterviewPrepCreate, InterviewPrepUpdate, InterviewPrepResponse,
@@ -15,7 +15,7 @@ router = APIRouter()
 
 @router.get("/interview-prep", response_model=List[InterviewPrepResponse])
 async def get_interview_preps(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     preps = db.query(InterviewPrep).filter(InterviewPrep.user_id == current_user.id).all()
@@ -24,7 +24,7 @@ async def get_interview_preps(
 @router.post("/interview-prep", response_model=InterviewPrepResponse, status_code=status.HTTP_201_CREATED)
 async def create_interview_prep(
     prep_data: InterviewPrepCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     new_prep = InterviewPrep(user_id=current_user.id, **prep_data.dict())
@@ -37,7 +37,7 @@ async def create_interview_prep(
 async def update_interview_prep(
     prep_id: int,
     prep_update: InterviewPrepUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     prep = db.query(InterviewPrep).filter(
@@ -56,7 +56,7 @@ async def update_interview_prep(
 
 @router.get("/resumes", response_model=List[ResumeResponse])
 async def get_resumes(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     resumes = db.query(Resume).filter(Resume.user_id == current_user.id).all()
@@ -65,7 +65,7 @@ async def get_resumes(
 @router.post("/resumes", response_model=ResumeResponse, status_code=status.HTTP_201_CREATED)
 async def create_resume(
     resume_data: ResumeCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     new_resume = Resume(user_id=current_user.id, **resume_data.dict())
@@ -78,7 +78,7 @@ async def create_resume(
 async def update_resume(
     resume_id: int,
     resume_update: ResumeUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     resume = db.query(Resume).filter(
@@ -97,7 +97,7 @@ async def update_resume(
 
 @router.get("/client-connections", response_model=List[ClientConnectionResponse])
 async def get_client_connections(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     connections = db.query(ClientConnection).filter(
@@ -108,7 +108,7 @@ async def get_client_connections(
 @router.post("/client-connections", response_model=ClientConnectionResponse, status_code=status.HTTP_201_CREATED)
 async def create_client_connection(
     connection_data: ClientConnectionCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     new_connection = ClientConnection(user_id=current_user.id, **connection_data.dict())
@@ -1,10 +1,11 @@
 import secrets
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from typing import List
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user
-from app.models.user import User
+from app.core.user_cache import UserPrincipal
 from app.models.certification import Certification
 from app.models.course import Course, Enrollment
 from app.schemas.certification import CertificationResponse, CertificationVerification
@@ -19,7 +20,7 @@ def generate_verification_code() -> str:
 
 @router.get("", response_model=List[CertificationResponse])
 async def get_my_certifications(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     certifications = db.query(Certification).filter(
@@ -30,7 +31,7 @@ async def get_my_certifications(
 @router.post("/{course_id}/generate", response_model=CertificationResponse, status_code=status.HTTP_201_CREATED)
 async def generate_certification(
     course_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     enrollment = db.query(Enrollment).filter(
@@ -61,7 +62,15 @@ async def generate_certification(
         verification_code=generate_verification_code()
     )
     db.add(new_cert)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Concurrent request already issued it (unique user_id, course_id)
+        db.rollback()
+        return db.query(Certification).filter(
+            Certification.user_id == current_user.id,
+            Certification.course_id == course_id
+        ).first()
     db.refresh(new_cert)
     return new_cert
 
@@ -1,37 +1,28 @@
+from typing import Dict
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user
-from app.models.user import User
-from app.models.course import Lesson, Enrollment
-from app.schemas.content import ContentAccessCheck
+from app.core.entitlements import enrolled_course_ids
+from app.core.user_cache import UserPrincipal
+from app.models.course import Lesson, Module
+from app.schemas.content import ContentAccessCheck, LessonAccessBatchRequest
 
 router = APIRouter()
 
-@router.get("/lesson/{lesson_id}/access", response_model=ContentAccessCheck)
-async def check_lesson_access(
-    lesson_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
-    if not lesson:
-        raise HTTPException(status_code=404, detail="Lesson not found")
-    
-    if not lesson.is_locked:
+_lesson_access_columns = select(Lesson.id, Lesson.is_locked, Lesson.is_preview, Module.course_id).join(
+    Module, Module.id == Lesson.module_id
+)
+
+
+def _access(is_locked: bool, is_preview: bool, enrolled: bool) -> ContentAccessCheck:
+    if not is_locked:
         return ContentAccessCheck(has_access=True, is_locked=False)
-    
-    if lesson.is_preview:
+    if is_preview:
         return ContentAccessCheck(has_access=True, is_locked=False, unlock_message="This is a preview lesson")
-    
-    enrollment = db.query(Enrollment).filter(
-        Enrollment.user_id == current_user.id,
-        Enrollment.course_id == lesson.module.course_id
-    ).first()
-    
-    if enrollment and enrollment.status == "enrolled":
+    if enrolled:
         return ContentAccessCheck(has_access=True, is_locked=False)
-    
     return ContentAccessCheck(
         has_access=False,
         is_locked=True,
@@ -39,4 +30,40 @@ async def check_lesson_access(
     )
 
 
+def _access_map(db: Session, user_id: int, stmt) -> Dict[int, ContentAccessCheck]:
+    rows = db.execute(stmt).all()
+    course_ids = enrolled_course_ids(db, user_id) if any(row.is_locked and not row.is_preview for row in rows) else ()
+    return {row.id: _access(row.is_locked, row.is_preview, row.course_id in course_ids) for row in rows}
+
 
+@router.get("/lesson/{lesson_id}/access", response_model=ContentAccessCheck)
+async def check_lesson_access(
+    lesson_id: int,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    access = _access_map(db, current_user.id, _lesson_access_columns.where(Lesson.id == lesson_id))
+    if lesson_id not in access:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    return access[lesson_id]
+
+
+@router.post("/lessons/access", response_model=Dict[int, ContentAccessCheck])
+async def check_lessons_access(
+    body: LessonAccessBatchRequest,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Access for many lessons at once, keyed by lesson id. Unknown ids are left out."""
+    stmt = _lesson_access_columns.where(Lesson.id.in_(set(body.lesson_ids)))
+    return _access_map(db, current_user.id, stmt)
+
+
+@router.get("/courses/{course_id}/access", response_model=Dict[int, ContentAccessCheck])
+async def check_course_lessons_access(
+    course_id: int,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Access for every lesson in a course (e.g. the course player sidebar), keyed by lesson id."""
+    return _access_map(db, current_user.id, _lesson_access_columns.where(Module.course_id == course_id))
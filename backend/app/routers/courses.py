@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from app.core.database import get_db
+from app.core.cache import bump_catalog_version, cached_catalog_response
+from app.core.database import get_async_db
 from app.core.dependencies import get_current_active_user, require_admin
-from app.models.user import User
+from app.core.entitlements import invalidate_entitlements
+from app.core.user_cache import UserPrincipal
 from app.models.course import Course, Module, Lesson, Enrollment
+from app.services.dashboard_summary import drop_user_summary
 from app.schemas.course import (
     CourseCreate, CourseUpdate, CourseResponse, CourseDetailResponse,
     ModuleCreate, ModuleResponse, LessonCreate, LessonResponse,
@@ -15,22 +21,32 @@ router = APIRouter()
 
 @router.get("", response_model=List[CourseResponse])
 async def get_courses(
+    request: Request,
     category: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Course)
-    if category:
-        query = query.filter(Course.category == category)
-    if status:
-        query = query.filter(Course.status == status)
-    else:
-        query = query.filter(Course.status == "published")
-    return query.all()
+    async def load():
+        query = select(Course)
+        if category:
+            query = query.where(Course.category == category)
+        if status:
+            query = query.where(Course.status == status)
+        else:
+            query = query.where(Course.status == "published")
+        return (await db.scalars(query)).all()
+
+    return await cached_catalog_response(request, "courses", (category, status), List[CourseResponse], load)
 
 @router.get("/{course_id}", response_model=CourseDetailResponse)
-async def get_course(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(Course).filter(Course.id == course_id).first()
+async def get_course(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Fixed 3 round trips however large the course: course, its modules, all their lessons
+    # (selectinload batches each level with IN). Ordering by order_index comes from the relationships.
+    course = await db.scalar(
+        select(Course)
+        .where(Course.id == course_id)
+        .options(selectinload(Course.modules).selectinload(Module.lessons))
+    )
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     return course
@@ -38,81 +54,86 @@ async def get_course(course_id: int, db: Session = Depends(get_db)):
 @router.post("", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
 async def create_course(
     course_data: CourseCreate,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
     new_course = Course(**course_data.dict())
     db.add(new_course)
-    db.commit()
-    db.refresh(new_course)
+    await db.commit()
+    bump_catalog_version("courses")
+    await db.refresh(new_course)
     return new_course
 
 @router.put("/{course_id}", response_model=CourseResponse)
 async def update_course(
     course_id: int,
     course_update: CourseUpdate,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == course_id))
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
     update_data = course_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(course, field, value)
-    db.commit()
-    db.refresh(course)
+    await db.commit()
+    bump_catalog_version("courses")
+    await db.refresh(course)
     return course
 
 @router.post("/{course_id}/modules", response_model=ModuleResponse, status_code=status.HTTP_201_CREATED)
 async def create_module(
     course_id: int,
     module_data: ModuleCreate,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == course_id))
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
     new_module = Module(course_id=course_id, **module_data.dict(exclude={"course_id"}))
     db.add(new_module)
-    db.commit()
-    db.refresh(new_module)
+    await db.commit()
+    await db.refresh(new_module)
+    await db.refresh(new_module, attribute_names=["lessons"])
     return new_module
 
 @router.post("/modules/{module_id}/lessons", response_model=LessonResponse, status_code=status.HTTP_201_CREATED)
 async def create_lesson(
     module_id: int,
     lesson_data: LessonCreate,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    module = db.query(Module).filter(Module.id == module_id).first()
+    module = await db.scalar(select(Module).where(Module.id == module_id))
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     
     new_lesson = Lesson(module_id=module_id, **lesson_data.dict(exclude={"module_id"}))
     db.add(new_lesson)
-    db.commit()
-    db.refresh(new_lesson)
+    await db.commit()
+    await db.refresh(new_lesson)
     return new_lesson
 
 @router.post("/{course_id}/enroll", response_model=EnrollmentResponse, status_code=status.HTTP_201_CREATED)
 async def enroll_course(
     course_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == course_id))
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
-    existing_enrollment = db.query(Enrollment).filter(
-        Enrollment.user_id == current_user.id,
-        Enrollment.course_id == course_id
-    ).first()
+    existing_enrollment = await db.scalar(
+        select(Enrollment).where(
+            Enrollment.user_id == current_user.id,
+            Enrollment.course_id == course_id
+        )
+    )
     
     if existing_enrollment:
         raise HTTPException(status_code=400, detail="Already enrolled")
@@ -123,17 +144,21 @@ async def enroll_course(
         status="enrolled"
     )
     db.add(new_enrollment)
-    db.commit()
-    db.refresh(new_enrollment)
+    await db.execute(drop_user_summary(current_user.id))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Concurrent enroll won the unique (user_id, course_id) index
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Already enrolled")
+    invalidate_entitlements(current_user.id)
+    await db.refresh(new_enrollment)
     return new_enrollment
 
 @router.get("/my/enrollments", response_model=List[EnrollmentResponse])
 async def get_my_enrollments(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    enrollments = db.query(Enrollment).filter(Enrollment.user_id == current_user.id).all()
+    enrollments = (await db.scalars(select(Enrollment).where(Enrollment.user_id == current_user.id))).all()
     return enrollments
-
-
-
@@ -1,105 +1,136 @@
 import secrets
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, case, exists, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime, timezone
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
 from app.core.dependencies import get_current_active_user, require_admin
-from app.models.user import User
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.user_cache import UserPrincipal
 from app.models.live_class import LiveClass, LiveClassAttendee
 from app.models.course import Course, Enrollment
 from app.schemas.live_class import LiveClassCreate, LiveClassUpdate, LiveClassResponse
+from app.services.dashboard_summary import drop_course_summaries
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+
+
 def generate_meet_link() -> str:
     meeting_code = ''.join(secrets.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(10))
     return f"{settings.GOOGLE_MEET_BASE_URL}/{meeting_code}"
 
 @router.get("", response_model=List[LiveClassResponse])
 async def get_live_classes(
+    response: Response,
     course_id: int = None,
     include_past: bool = False,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """Upcoming classes soonest first, then (include_past) past classes newest first.
+    Keyset-paginated when `limit` or `cursor` is given (pages default to 50): pass the
+    X-Next-Cursor response header back as `cursor`. Without either, every class is returned."""
     now = datetime.now(timezone.utc)
-    query = db.query(LiveClass)
+    upcoming = LiveClass.scheduled_at >= now
+    query = select(LiveClass)
 
     if course_id:
-        query = query.filter(LiveClass.course_id == course_id)
+        query = query.where(LiveClass.course_id == course_id)
         if current_user.role != "admin":
-            enrollment = db.query(Enrollment).filter(
-                Enrollment.user_id == current_user.id,
-                Enrollment.course_id == course_id
-            ).first()
+            enrollment = await db.scalar(
+                select(Enrollment.id).where(
+                    Enrollment.user_id == current_user.id,
+                    Enrollment.course_id == course_id
+                )
+            )
             if not enrollment:
                 raise HTTPException(status_code=403, detail="Not enrolled in this course")
     elif current_user.role != "admin":
-        enrolled_course_ids = [
-            row[0] for row in db.query(Enrollment.course_id).filter(
-                Enrollment.user_id == current_user.id
-            ).distinct().all()
+        # Classes of enrolled courses, plus ones this user is invited to (VSA batch/calendar invite)
+        visible = [
+            exists().where(
+                Enrollment.user_id == current_user.id,
+                Enrollment.course_id == LiveClass.course_id,
+            )
         ]
-        # Also include live classes where this user is an invitee (VSA batch/calendar invite)
         user_email = (current_user.email or "").strip().lower()
-        invited_class_ids = []
         if user_email:
-            invited_class_ids = [
-                row[0] for row in db.query(LiveClassAttendee.live_class_id).filter(
-                    LiveClassAttendee.email == user_email
-                ).distinct().all()
-            ]
-        allowed_course_ids = set(enrolled_course_ids)
-        allowed_class_ids = set(invited_class_ids)
-        if not allowed_course_ids and not allowed_class_ids:
-            return []
-        conds = []
-        if allowed_course_ids:
-            conds.append(LiveClass.course_id.in_(allowed_course_ids))
-        if allowed_class_ids:
-            conds.append(LiveClass.id.in_(allowed_class_ids))
-        query = query.filter(or_(*conds))
+            visible.append(
+                exists().where(
+                    LiveClassAttendee.live_class_id == LiveClass.id,
+                    LiveClassAttendee.email == user_email,
+                )
+            )
+        query = query.where(or_(*visible))
 
     if not include_past:
-        query = query.filter(LiveClass.scheduled_at >= now).order_by(LiveClass.scheduled_at.asc())
-        return query.all()
-
-    all_classes = query.order_by(LiveClass.scheduled_at.desc()).all()
-    upcoming = [c for c in all_classes if c.scheduled_at >= now]
-    past = [c for c in all_classes if c.scheduled_at < now]
-    upcoming.sort(key=lambda c: c.scheduled_at)
-    return upcoming + past
+        query = query.where(upcoming)
+
+    if cursor:
+        past_page, after_at, after_id = decode_cursor(cursor, (bool, datetime, int))
+        key = tuple_(LiveClass.scheduled_at, LiveClass.id)
+        if past_page:
+            query = query.where(~upcoming, key < tuple_(after_at, after_id))
+        else:
+            query = query.where(or_(and_(upcoming, key > tuple_(after_at, after_id)), ~upcoming))
+
+    query = query.order_by(
+        case((upcoming, 0), else_=1),
+        case((upcoming, LiveClass.scheduled_at)).asc(),
+        case((upcoming, LiveClass.id)).asc(),
+        case((~upcoming, LiveClass.scheduled_at)).desc(),
+        case((~upcoming, LiveClass.id)).desc(),
+    )
+    if limit is None and cursor is None:
+        return (await db.scalars(query)).all()
+    limit = limit or DEFAULT_PAGE_SIZE
+
+    classes = (await db.scalars(query.limit(limit + 1))).all()
+    if len(classes) > limit:
+        classes = classes[:limit]
+        last = classes[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            [last.scheduled_at < now, last.scheduled_at, last.id]
+        )
+    return classes
 
 @router.get("/{class_id}", response_model=LiveClassResponse)
 async def get_live_class(
     class_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    live_class = db.query(LiveClass).filter(LiveClass.id == class_id).first()
+    live_class = await db.scalar(select(LiveClass).where(LiveClass.id == class_id))
     if not live_class:
         raise HTTPException(status_code=404, detail="Live class not found")
 
     if current_user.role == "admin":
         return live_class
 
-    enrollment = db.query(Enrollment).filter(
-        Enrollment.user_id == current_user.id,
-        Enrollment.course_id == live_class.course_id
-    ).first()
+    enrollment = await db.scalar(
+        select(Enrollment.id).where(
+            Enrollment.user_id == current_user.id,
+            Enrollment.course_id == live_class.course_id
+        )
+    )
     if enrollment:
         return live_class
 
     # Allow if user was added as invitee (VSA batch/calendar invite)
     user_email = (current_user.email or "").strip().lower()
     if user_email:
-        is_attendee = db.query(LiveClassAttendee).filter(
-            LiveClassAttendee.live_class_id == live_class.id,
-            LiveClassAttendee.email == user_email,
-        ).first()
+        is_attendee = await db.scalar(
+            select(LiveClassAttendee.id).where(
+                LiveClassAttendee.live_class_id == live_class.id,
+                LiveClassAttendee.email == user_email,
+            )
+        )
         if is_attendee:
             return live_class
 
@@ -108,10 +139,10 @@ async def get_live_class(
 @router.post("", response_model=LiveClassResponse, status_code=status.HTTP_201_CREATED)
 async def create_live_class(
     class_data: LiveClassCreate,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    course = db.query(Course).filter(Course.id == class_data.course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == class_data.course_id))
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
@@ -122,26 +153,28 @@ async def create_live_class(
         instructor_id=class_data.instructor_id or current_user.id
     )
     db.add(new_class)
-    db.commit()
-    db.refresh(new_class)
+    await db.execute(drop_course_summaries(new_class.course_id))
+    await db.commit()
+    await db.refresh(new_class)
     return new_class
 
 @router.put("/{class_id}", response_model=LiveClassResponse)
 async def update_live_class(
     class_id: int,
     class_update: LiveClassUpdate,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    live_class = db.query(LiveClass).filter(LiveClass.id == class_id).first()
+    live_class = await db.scalar(select(LiveClass).where(LiveClass.id == class_id))
     if not live_class:
         raise HTTPException(status_code=404, detail="Live class not found")
     
     update_data = class_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(live_class, field, value)
-    db.commit()
-    db.refresh(live_class)
+    await db.execute(drop_course_summaries(live_class.course_id))
+    await db.commit()
+    await db.refresh(live_class)
     return live_class
 
 
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user
-from app.models.user import User
+from app.core.user_cache import UserPrincipal
 from app.models.note import Note
 from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse
 
@@ -12,7 +12,7 @@ router = APIRouter()
 @router.get("", response_model=List[NoteResponse])
 async def get_notes(
     lesson_id: int = None,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     query = db.query(Note).filter(Note.user_id == current_user.id)
@@ -23,7 +23,7 @@ async def get_notes(
 @router.get("/{note_id}", response_model=NoteResponse)
 async def get_note(
     note_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     note = db.query(Note).filter(
@@ -37,7 +37,7 @@ async def get_note(
 @router.post("", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 async def create_note(
     note_data: NoteCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     new_note = Note(
@@ -53,7 +53,7 @@ async def create_note(
 async def update_note(
     note_id: int,
     note_update: NoteUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     note = db.query(Note).filter(
@@ -73,7 +73,7 @@ async def update_note(
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_note(
     note_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     note = db.query(Note).filter(
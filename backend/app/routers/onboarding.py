@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from typing import List
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user
-from app.models.user import User
+from app.core.user_cache import UserPrincipal
 from app.models.onboarding import OnboardingStep
 from app.schemas.onboarding import OnboardingStepCreate, OnboardingStepUpdate, OnboardingStepResponse
 
@@ -11,7 +12,7 @@ router = APIRouter()
 
 @router.get("", response_model=List[OnboardingStepResponse])
 async def get_onboarding_steps(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     steps = db.query(OnboardingStep).filter(
@@ -22,7 +23,7 @@ async def get_onboarding_steps(
 @router.post("", response_model=OnboardingStepResponse, status_code=status.HTTP_201_CREATED)
 async def create_onboarding_step(
     step_data: OnboardingStepCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     existing_step = db.query(OnboardingStep).filter(
@@ -40,7 +41,11 @@ async def create_onboarding_step(
     
     new_step = OnboardingStep(user_id=current_user.id, **step_data.dict())
     db.add(new_step)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Onboarding step already exists")
     db.refresh(new_step)
     return new_step
 
@@ -48,7 +53,7 @@ async def create_onboarding_step(
 async def update_onboarding_step(
     step_id: int,
     step_update: OnboardingStepUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     step = db.query(OnboardingStep).filter(
@@ -1,22 +1,25 @@
-import razorpay
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.config import settings
 from app.core.dependencies import get_current_active_user
-from app.models.user import User
+from app.core.entitlements import invalidate_entitlements
+from app.core.user_cache import UserPrincipal
 from app.models.payment import Payment
-from app.models.course import Course, Enrollment
+from app.models.course import Course
+from app.services.payment_gateway import create_order, new_receipt, verify_payment_signature
+from app.services.payments import (
+    claim_webhook_event, complete_payment, lock_payment, refund_payment, verify_webhook_signature, webhook_event_id,
+)
 from app.schemas.payment import PaymentCreate, PaymentResponse, RazorpayOrderResponse, PaymentVerification
 
 router = APIRouter()
 
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
-
 @router.post("/create-order", response_model=RazorpayOrderResponse)
 async def create_payment_order(
     payment_data: PaymentCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     course = db.query(Course).filter(Course.id == payment_data.course_id).first()
@@ -28,14 +31,14 @@ async def create_payment_order(
     order_data = {
         "amount": amount_in_paise,
         "currency": payment_data.currency,
-        "receipt": f"course_{payment_data.course_id}_user_{current_user.id}",
+        "receipt": new_receipt(payment_data.course_id, current_user.id),
         "notes": {
             "course_id": payment_data.course_id,
             "user_id": current_user.id
         }
     }
     
-    razorpay_order = client.order.create(data=order_data)
+    razorpay_order = await create_order(order_data)
     
     payment_record = Payment(
         user_id=current_user.id,
@@ -58,78 +61,100 @@ async def create_payment_order(
 @router.post("/verify", response_model=PaymentResponse)
 async def verify_payment(
     verification: PaymentVerification,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    payment = db.query(Payment).filter(
+    """
+    Idempotent on razorpay_order_id: repeating a verify (or racing the payment.captured
+    webhook) returns the completed payment without writing anything. A refunded payment
+    is final and gets 409.
+    """
+    order_filter = (
         Payment.razorpay_order_id == verification.razorpay_order_id,
-        Payment.user_id == current_user.id
-    ).first()
-    
+        Payment.user_id == current_user.id,
+    )
+    params_dict = {
+        "razorpay_order_id": verification.razorpay_order_id,
+        "razorpay_payment_id": verification.razorpay_payment_id,
+        "razorpay_signature": verification.razorpay_signature
+    }
+    if not verify_payment_signature(params_dict):
+        # A forged or stale callback must not flip a payment that already went through
+        db.query(Payment).filter(*order_filter, Payment.status == "pending").update(
+            {Payment.status: "failed", Payment.failure_reason: "Signature verification failed"},
+            synchronize_session=False,
+        )
+        db.commit()
+        raise HTTPException(status_code=400, detail="Payment verification failed")
+
+    payment = lock_payment(db, *order_filter)
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
-    
-    try:
-        params_dict = {
-            "razorpay_order_id": verification.razorpay_order_id,
-            "razorpay_payment_id": verification.razorpay_payment_id,
-            "razorpay_signature": verification.razorpay_signature
-        }
-        client.utility.verify_payment_signature(params_dict)
-        
-        payment.razorpay_payment_id = verification.razorpay_payment_id
-        payment.razorpay_signature = verification.razorpay_signature
-        payment.status = "completed"
-        
-        enrollment = db.query(Enrollment).filter(
-            Enrollment.user_id == current_user.id,
-            Enrollment.course_id == payment.course_id
-        ).first()
-        
-        if not enrollment:
-            enrollment = Enrollment(
-                user_id=current_user.id,
-                course_id=payment.course_id,
-                status="enrolled"
-            )
-            db.add(enrollment)
-        
+    if payment.status == "refunded":
+        raise HTTPException(status_code=409, detail="Payment has been refunded")
+
+    if complete_payment(db, payment, verification.razorpay_payment_id, verification.razorpay_signature):
         db.commit()
+        invalidate_entitlements(current_user.id)
         db.refresh(payment)
-        return payment
-        
-    except razorpay.errors.SignatureVerificationError:
-        payment.status = "failed"
-        payment.failure_reason = "Signature verification failed"
-        db.commit()
-        raise HTTPException(status_code=400, detail="Payment verification failed")
+    return payment
 
 @router.get("/history", response_model=list[PaymentResponse])
 async def get_payment_history(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     payments = db.query(Payment).filter(Payment.user_id == current_user.id).all()
     return payments
 
+def _payment_entity(data: dict) -> dict:
+    """payload.payment.entity of a webhook body, or {} if any level is missing or not an object."""
+    node = data
+    for key in ("payload", "payment", "entity"):
+        node = node.get(key) if isinstance(node, dict) else None
+    return node if isinstance(node, dict) else {}
+
 @router.post("/webhook")
-async def payment_webhook(request: dict, db: Session = Depends(get_db)):
-    event = request.get("event")
-    payload = request.get("payload", {})
-    
-    if event == "payment.captured":
-        payment_id = payload.get("payment", {}).get("entity", {}).get("id")
-        order_id = payload.get("payment", {}).get("entity", {}).get("order_id")
-        
-        payment = db.query(Payment).filter(
-            Payment.razorpay_payment_id == payment_id
-        ).first()
-        
-        if payment:
-            payment.status = "completed"
-            db.commit()
-    
-    return {"status": "ok"}
+async def payment_webhook(request: Request, db: Session = Depends(get_db)):
+    """
+    Razorpay webhook. The signature is checked before any DB work; each event id is
+    applied once (processed_webhook_events), so redeliveries are a single indexed insert
+    that conflicts and writes nothing.
+    """
+    body = await request.body()
+    if not settings.RAZORPAY_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook secret not configured")
+    if not verify_webhook_signature(body, request.headers.get("X-Razorpay-Signature")):
+        raise HTTPException(status_code=400, detail="Invalid webhook signature")
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Invalid webhook payload")
+
+    event = data.get("event") if isinstance(data.get("event"), str) else ""
+    entity = _payment_entity(data)
+    event_id = webhook_event_id(request.headers.get("X-Razorpay-Event-Id"), body)
+    if not claim_webhook_event(db, event_id, event):
+        db.rollback()
+        return {"status": "ok", "duplicate": True}
+
+    access_changed_for = None
+    # A missing id must never become "WHERE ... IS NULL" and lock some unrelated payment
+    if event == "payment.captured" and entity.get("order_id"):
+        payment = lock_payment(db, Payment.razorpay_order_id == entity["order_id"])
+        if payment and complete_payment(db, payment, entity.get("id")):
+            access_changed_for = payment.user_id
 
+    elif event == "refund.processed" and entity.get("id"):
+        payment = lock_payment(db, Payment.razorpay_payment_id == entity["id"])
 
+        # Partial refunds keep the enrollment; a full refund revokes course access
+        if payment and entity.get("refund_status") == "full" and refund_payment(db, payment):
+            access_changed_for = payment.user_id
 
+    db.commit()
+    if access_changed_for is not None:
+        invalidate_entitlements(access_changed_for)
+    return {"status": "ok"}
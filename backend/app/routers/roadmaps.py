@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from typing import List
+from app.core.cache import bump_catalog_version, cached_catalog_response
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user, require_admin
-from app.models.user import User
+from app.core.user_cache import UserPrincipal
 from app.models.roadmap import Roadmap
 from app.schemas.roadmap import RoadmapCreate, RoadmapUpdate, RoadmapResponse
 
@@ -11,13 +12,17 @@ router = APIRouter()
 
 @router.get("", response_model=List[RoadmapResponse])
 async def get_roadmaps(
+    request: Request,
     category: str = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Roadmap).filter(Roadmap.is_active == True)
-    if category:
-        query = query.filter(Roadmap.category == category)
-    return query.order_by(Roadmap.order).all()
+    def load():
+        query = db.query(Roadmap).filter(Roadmap.is_active == True)
+        if category:
+            query = query.filter(Roadmap.category == category)
+        return query.order_by(Roadmap.order).all()
+
+    return await cached_catalog_response(request, "roadmaps", category, List[RoadmapResponse], load)
 
 @router.get("/{roadmap_id}", response_model=RoadmapResponse)
 async def get_roadmap(roadmap_id: int, db: Session = Depends(get_db)):
@@ -29,12 +34,13 @@ async def get_roadmap(roadmap_id: int, db: Session = Depends(get_db)):
 @router.post("", response_model=RoadmapResponse, status_code=status.HTTP_201_CREATED)
 async def create_roadmap(
     roadmap_data: RoadmapCreate,
-    current_user: User = Depends(require_admin),
+    current_user: UserPrincipal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     new_roadmap = Roadmap(**roadmap_data.dict())
     db.add(new_roadmap)
     db.commit()
+    bump_catalog_version("roadmaps")
     db.refresh(new_roadmap)
     return new_roadmap
 
@@ -42,7 +48,7 @@ async def create_roadmap(
 async def update_roadmap(
     roadmap_id: int,
     roadmap_update: RoadmapUpdate,
-    current_user: User = Depends(require_admin),
+    current_user: UserPrincipal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     roadmap = db.query(Roadmap).filter(Roadmap.id == roadmap_id).first()
@@ -53,6 +59,7 @@ async def update_roadmap(
     for field, value in update_data.items():
         setattr(roadmap, field, value)
     db.commit()
+    bump_catalog_version("roadmaps")
     db.refresh(roadmap)
     return roadmap
 
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from typing import List
+from app.core.cache import bump_catalog_version, cached_catalog_response
 from app.core.database import get_db
 from app.core.dependencies import get_current_active_user, require_admin
-from app.models.user import User
+from app.core.user_cache import UserPrincipal
 from app.models.testimonial import Testimonial
 from app.schemas.testimonial import TestimonialCreate, TestimonialUpdate, TestimonialResponse
 
@@ -11,26 +12,33 @@ router = APIRouter()
 
 @router.get("", response_model=List[TestimonialResponse])
 async def get_testimonials(
+    request: Request,
     course_id: int = None,
     approved_only: bool = True,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Testimonial)
-    if approved_only:
-        query = query.filter(Testimonial.is_approved == 1)
-    if course_id:
-        query = query.filter(Testimonial.course_id == course_id)
-    return query.order_by(Testimonial.created_at.desc()).all()
+    def load():
+        query = db.query(Testimonial)
+        if approved_only:
+            query = query.filter(Testimonial.is_approved == 1)
+        if course_id:
+            query = query.filter(Testimonial.course_id == course_id)
+        return query.order_by(Testimonial.created_at.desc()).all()
+
+    return await cached_catalog_response(
+        request, "testimonials", (course_id, approved_only), List[TestimonialResponse], load
+    )
 
 @router.post("", response_model=TestimonialResponse, status_code=status.HTTP_201_CREATED)
 async def create_testimonial(
     testimonial_data: TestimonialCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     new_testimonial = Testimonial(**testimonial_data.dict())
     db.add(new_testimonial)
     db.commit()
+    bump_catalog_version("testimonials")
     db.refresh(new_testimonial)
     return new_testimonial
 
@@ -38,7 +46,7 @@ async def create_testimonial(
 async def update_testimonial(
     testimonial_id: int,
     testimonial_update: TestimonialUpdate,
-    current_user: User = Depends(require_admin),
+    current_user: UserPrincipal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     testimonial = db.query(Testimonial).filter(Testimonial.id == testimonial_id).first()
@@ -49,6 +57,7 @@ async def update_testimonial(
     for field, value in update_data.items():
         setattr(testimonial, field, value)
     db.commit()
+    bump_catalog_version("testimonials")
     db.refresh(testimonial)
     return testimonial
 
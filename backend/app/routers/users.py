@@ -1,28 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from app.core.database import get_db
-from app.core.dependencies import get_current_active_user
-from app.models.user import User
+from app.core.dependencies import get_current_active_user_model
+from app.core.user_cache import invalidate_user
+from app.models.user import User, normalize_phone
 from app.schemas.user import UserUpdate, UserResponse
 
 router = APIRouter()
 
 @router.get("/profile", response_model=UserResponse)
-async def get_profile(current_user: User = Depends(get_current_active_user)):
+async def get_profile(current_user: User = Depends(get_current_active_user_model)):
     return current_user
 
 @router.put("/profile", response_model=UserResponse)
 async def update_profile(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_model),
     db: Session = Depends(get_db)
 ):
     update_data = user_update.dict(exclude_unset=True)
+    if update_data.get("phone"):
+        phone_digits = normalize_phone(update_data["phone"])
+        taken = db.query(User.id).filter(
+            User.phone_normalized == phone_digits,
+            User.id != current_user.id
+        ).first()
+        if taken:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Phone number already registered")
+    # Setting phone also refreshes phone_normalized (see User._sync_phone_normalized)
     for field, value in update_data.items():
         setattr(current_user, field, value)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Phone number already registered")
+    invalidate_user(current_user.id)
     db.refresh(current_user)
     return current_user
-
-
-
@@ -1,91 +1,431 @@
 import os
+import hashlib
+import uuid
+from datetime import timezone
 import aiofiles
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.database import AsyncSessionLocal, get_async_db
 from app.core.config import settings
 from app.core.dependencies import get_current_active_user, require_admin
-from app.models.user import User
-from app.models.content import VideoContent
-from app.models.course import Lesson
+from app.core.user_cache import UserPrincipal
+from app.core.security import create_video_stream_token, decode_video_stream_token
+from app.models.content import VideoContent, VideoUpload
+from app.models.course import Lesson, Module, Enrollment
+from app.schemas.content import VideoStreamUrlResponse, VideoUploadInit, VideoUploadStatus
+from app.services.video_delivery import accel_redirect_response, ranged_file_response
+from app.services import video_storage
+from app.services.video_processing import enqueue_video_processing, hls_dir_for, thumbnail_path_for
 
 router = APIRouter()
 
 ALLOWED_EXTENSIONS = {'.mp4', '.webm', '.ogg'}
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+HLS_MEDIA_TYPES = {'.m3u8': 'application/vnd.apple.mpegurl', '.ts': 'video/mp2t'}
 
-@router.post("/upload")
-async def upload_video(
-    file: UploadFile = File(...),
-    lesson_id: int = None,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No file provided")
-    
-    file_ext = os.path.splitext(file.filename)[1].lower()
+# Filled when a signed URL is issued, so its range requests resolve the file without a DB read
+_video_paths = TTLCache(settings.VIDEO_PATH_CACHE_MAX_ENTRIES, settings.VIDEO_STREAM_TOKEN_EXPIRE_MINUTES * 60)
+
+def _check_extension(filename: str) -> str:
+    file_ext = os.path.splitext(filename)[1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
             detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
         )
-    
-    os.makedirs(settings.VIDEO_DIR, exist_ok=True)
-    
-    file_path = os.path.join(settings.VIDEO_DIR, file.filename)
-    
-    file_size = 0
-    async with aiofiles.open(file_path, 'wb') as f:
-        while chunk := await file.read(1024 * 1024):
-            file_size += len(chunk)
-            if file_size > settings.MAX_UPLOAD_SIZE:
-                os.remove(file_path)
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / (1024*1024)}MB"
-                )
-            await f.write(chunk)
-    
+    return file_ext
+
+def _size_exceeded() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE / (1024*1024)}MB"
+    )
+
+async def _create_video_content(db: AsyncSession, title: str, file_path: str, file_size: int, content_hash: str, lesson_id: int = None) -> VideoContent:
     video_content = VideoContent(
         lesson_id=lesson_id,
-        title=file.filename,
+        title=title,
         file_path=file_path,
-        file_size=file_size
+        file_size=file_size,
+        content_hash=content_hash
     )
     db.add(video_content)
-    db.commit()
-    db.refresh(video_content)
+    await db.flush()
+    # Duration, thumbnail and HLS renditions are produced by the video worker
+    enqueue_video_processing(db, video_content)
+    await db.commit()
+    await db.refresh(video_content)
     
     if lesson_id:
-        lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+        lesson = await db.scalar(select(Lesson).where(Lesson.id == lesson_id))
         if lesson:
             lesson.video_url = f"/api/video/stream/{video_content.id}"
-            db.commit()
-    
+            await db.commit()
+    return video_content
+
+def _video_content_response(video_content: VideoContent) -> dict:
     return {
         "id": video_content.id,
         "title": video_content.title,
         "file_path": video_content.file_path,
         "file_size": video_content.file_size,
-        "stream_url": f"/api/video/stream/{video_content.id}"
+        "content_hash": video_content.content_hash,
+        "processing_status": video_content.processing_status,
+        "stream_url": f"/api/video/stream/{video_content.id}",
+        "playlist_url": f"/api/video/playlist/{video_content.id}"
     }
 
+def _upload_status(upload: VideoUpload) -> VideoUploadStatus:
+    return VideoUploadStatus(
+        upload_id=upload.id,
+        filename=upload.filename,
+        total_size=upload.total_size,
+        offset=upload.received_bytes,
+        status=upload.status,
+        video_content_id=upload.video_content_id
+    )
+
+async def _get_upload(db: AsyncSession, upload_id: str, lock: bool = False) -> VideoUpload:
+    query = select(VideoUpload).where(VideoUpload.id == upload_id)
+    if lock:
+        query = query.with_for_update()
+    upload = await db.scalar(query)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+@router.post("/upload")
+async def upload_video(
+    file: UploadFile = File(...),
+    lesson_id: int = None,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    
+    file_ext = _check_extension(file.filename)
+    
+    os.makedirs(settings.VIDEO_DIR, exist_ok=True)
+    
+    # Written to a temp file and stored under its content hash, so same-named files never overwrite each other
+    temp_path = video_storage.temp_path_for(uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    
+    file_size = 0
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > settings.MAX_UPLOAD_SIZE:
+                    raise _size_exceeded()
+                digest.update(chunk)
+                await f.write(chunk)
+
+        content_hash = digest.hexdigest()
+        file_path = video_storage.store_by_hash(temp_path, content_hash, file_ext)
+    except BaseException:
+        # Size limit, client disconnect, disk error or a failed store: never leave the temp file behind
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    video_content = await _create_video_content(db, file.filename, file_path, file_size, content_hash, lesson_id)
+    return _video_content_response(video_content)
+
+@router.post("/uploads", response_model=VideoUploadStatus, status_code=status.HTTP_201_CREATED)
+async def init_resumable_upload(
+    upload_data: VideoUploadInit,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Start a resumable upload. Send the bytes with PUT /uploads/{upload_id}?offset=N, then finalize."""
+    _check_extension(upload_data.filename)
+    if upload_data.total_size <= 0:
+        raise HTTPException(status_code=400, detail="total_size must be positive")
+    if upload_data.total_size > settings.MAX_UPLOAD_SIZE:
+        raise _size_exceeded()
+    
+    upload = VideoUpload(
+        id=uuid.uuid4().hex,
+        user_id=current_user.id,
+        lesson_id=upload_data.lesson_id,
+        filename=upload_data.filename,
+        total_size=upload_data.total_size,
+        received_bytes=0,
+        status="uploading"
+    )
+    db.add(upload)
+    await db.commit()
+    await db.refresh(upload)
+    # Create an empty temp file so the first chunk can be written at offset 0
+    open(video_storage.temp_path_for(upload.id), "wb").close()
+    return _upload_status(upload)
+
+@router.get("/uploads/{upload_id}", response_model=VideoUploadStatus)
+async def get_resumable_upload(
+    upload_id: str,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Current offset of an upload; a client resumes a dropped connection by PUTting from here."""
+    return _upload_status(await _get_upload(db, upload_id))
+
+def _check_chunk_offset(upload: VideoUpload, offset: int) -> None:
+    if upload.status != "uploading":
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+    if offset != upload.received_bytes:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Offset mismatch: expected {upload.received_bytes}",
+            headers={"Upload-Offset": str(upload.received_bytes)}
+        )
+
+@router.put("/uploads/{upload_id}", response_model=VideoUploadStatus)
+async def put_upload_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Append the raw request body at `offset`. The offset must equal the bytes received so far.
+    The body is streamed to a part file with no DB connection held; the row is then locked
+    only long enough to re-check the offset and splice the part into the upload.
+    """
+    upload = await _get_upload(db, upload_id)
+    _check_chunk_offset(upload, offset)
+    total_size = upload.total_size
+    temp_path = video_storage.temp_path_for(upload_id)
+    if not os.path.exists(temp_path):
+        raise HTTPException(status_code=410, detail="Upload data is gone; start a new upload")
+    # Give the pooled connection back while a possibly slow client sends the body
+    await db.rollback()
+
+    # Hash a copy: a concurrent PUT at the same offset must not advance the shared hasher
+    digest = video_storage.hasher_at(upload_id, offset)
+    digest = digest.copy() if digest is not None else None
+    part_path = f"{temp_path}.{uuid.uuid4().hex}.part"
+    new_offset = offset
+    try:
+        async with aiofiles.open(part_path, 'wb') as f:
+            async for chunk in request.stream():
+                if not chunk:
+                    continue
+                new_offset += len(chunk)
+                if new_offset > total_size:
+                    raise HTTPException(status_code=400, detail="Chunk exceeds declared total_size")
+                await f.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+
+        upload = await _get_upload(db, upload_id, lock=True)
+        _check_chunk_offset(upload, offset)
+        # Also drops any bytes left over from an earlier, unacknowledged attempt
+        await run_in_threadpool(video_storage.splice_part, temp_path, part_path, offset)
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    if digest is not None:
+        video_storage.record_hashed(upload_id, digest, new_offset)
+    else:
+        video_storage.discard_hasher(upload_id)
+    upload.received_bytes = new_offset
+    await db.commit()
+    await db.refresh(upload)
+    return _upload_status(upload)
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_resumable_upload(
+    upload_id: str,
+    current_user: UserPrincipal = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Move the completed upload into content-addressed storage and create the VideoContent row."""
+    upload = await _get_upload(db, upload_id, lock=True)
+    if upload.status == "completed":
+        video_content = await db.scalar(select(VideoContent).where(VideoContent.id == upload.video_content_id))
+        return _video_content_response(video_content)
+    if upload.received_bytes != upload.total_size:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: {upload.received_bytes} of {upload.total_size} bytes received",
+            headers={"Upload-Offset": str(upload.received_bytes)}
+        )
+    
+    temp_path = video_storage.temp_path_for(upload.id)
+    file_ext = os.path.splitext(upload.filename)[1].lower()
+    # May re-read the whole file from disk; keep it off the event loop
+    content_hash = await run_in_threadpool(video_storage.finished_hash, upload.id, temp_path, upload.total_size)
+    file_path = video_storage.store_by_hash(temp_path, content_hash, file_ext)
+    
+    video_content = await _create_video_content(
+        db, upload.filename, file_path, upload.total_size, content_hash, upload.lesson_id
+    )
+    upload.status = "completed"
+    upload.video_content_id = video_content.id
+    await db.commit()
+    return _video_content_response(video_content)
+
+def _serve_video_file(request: Request, file_path: str):
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Video file not found")
+
+    # nginx ships the bytes when X-Accel-Redirect offload is configured
+    offloaded = accel_redirect_response(file_path)
+    if offloaded is not None:
+        return offloaded
+
+    # Honours Range / If-Range so players can seek without re-downloading from byte 0
+    return ranged_file_response(request, file_path)
+
+async def _can_watch(video: VideoContent, user: UserPrincipal, db: AsyncSession) -> bool:
+    """Same rules as content.check_lesson_access: admins, unlocked/preview lessons, or an active enrollment."""
+    if user.role == "admin" or video.lesson_id is None:
+        return True
+    lesson = await db.scalar(select(Lesson).where(Lesson.id == video.lesson_id))
+    if not lesson or not lesson.is_locked or lesson.is_preview:
+        return True
+    enrollment = await db.scalar(
+        select(Enrollment.id).join(Module, Module.course_id == Enrollment.course_id).where(
+            Module.id == lesson.module_id,
+            Enrollment.user_id == user.id,
+            Enrollment.status == "enrolled"
+        )
+    )
+    return enrollment is not None
+
+@router.post("/{video_id}/stream-url", response_model=VideoStreamUrlResponse)
+async def get_signed_stream_url(
+    video_id: int,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Check access once and return a short-lived signed URL. The player can then issue
+    as many range requests as it likes against it without auth or DB work per request.
+    """
+    video = await db.scalar(select(VideoContent).where(VideoContent.id == video_id))
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if not await _can_watch(video, current_user, db):
+        raise HTTPException(status_code=403, detail="Please enroll in this course to access this content")
+
+    token, expires_at = create_video_stream_token(video.id, current_user.id)
+    _video_paths.set(video.id, video.file_path)
+    hls_url = None
+    if video.hls_playlist_path:
+        hls_url = f"/api/video/hls/{video.id}/master.m3u8?token={token}"
+    thumbnail_url = None
+    if video.thumbnail_url:
+        # Signed like the stream so it works as an <img src>, which sends no Authorization header
+        thumbnail_url = f"{video.thumbnail_url}?token={token}"
+    return VideoStreamUrlResponse(
+        stream_url=f"/api/video/signed/{video.id}?token={token}",
+        hls_url=hls_url,
+        thumbnail_url=thumbnail_url,
+        expires_at=expires_at.replace(tzinfo=timezone.utc)
+    )
+
+@router.get("/signed/{video_id}")
+async def stream_signed_video(video_id: int, token: str, request: Request):
+    """Stream using a URL from /{video_id}/stream-url. No auth dependency, and no DB session
+    unless the URL was issued by another process (or before a restart)."""
+    if decode_video_stream_token(token, video_id) is None:
+        raise HTTPException(status_code=403, detail="Invalid or expired video link")
+    file_path = _video_paths.get(video_id)
+    if file_path is None:
+        async with AsyncSessionLocal() as db:
+            file_path = await db.scalar(select(VideoContent.file_path).where(VideoContent.id == video_id))
+        if file_path is None:
+            raise HTTPException(status_code=404, detail="Video not found")
+        _video_paths.set(video_id, file_path)
+    return _serve_video_file(request, file_path)
+
 @router.get("/stream/{video_id}")
 async def stream_video(
     video_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    video = db.query(VideoContent).filter(VideoContent.id == video_id).first()
+    video = await db.scalar(select(VideoContent).where(VideoContent.id == video_id))
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
+    if not await _can_watch(video, current_user, db):
+        raise HTTPException(status_code=403, detail="Please enroll in this course to access this content")
     
-    if not os.path.exists(video.file_path):
-        raise HTTPException(status_code=404, detail="Video file not found")
-    
-    file_like = open(video.file_path, mode="rb")
-    return StreamingResponse(file_like, media_type="video/mp4")
+    return _serve_video_file(request, video.file_path)
+
+def _sign_playlist(playlist: str, token: str, base_url: str = "") -> str:
+    """Append the stream token to every URI line so segment fetches need no auth header."""
+    lines = []
+    for line in playlist.splitlines():
+        if line and not line.startswith("#"):
+            line = f"{base_url}{line}?token={token}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+@router.get("/playlist/{video_id}")
+async def get_hls_playlist(
+    video_id: int,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Adaptive (HLS) master playlist. Variant and segment URLs carry a signed token."""
+    video = await db.scalar(select(VideoContent).where(VideoContent.id == video_id))
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if not await _can_watch(video, current_user, db):
+        raise HTTPException(status_code=403, detail="Please enroll in this course to access this content")
+    if not video.hls_playlist_path or not os.path.exists(video.hls_playlist_path):
+        raise HTTPException(status_code=404, detail="Video is still processing")
+
+    token, _ = create_video_stream_token(video.id, current_user.id)
+    with open(video.hls_playlist_path) as f:
+        body = _sign_playlist(f.read(), token, base_url=f"/api/video/hls/{video.id}/")
+    return Response(content=body, media_type=HLS_MEDIA_TYPES[".m3u8"], headers={"Cache-Control": "private, no-store"})
+
+@router.get("/hls/{video_id}/{file_path:path}")
+async def get_hls_file(video_id: int, file_path: str, token: str, request: Request):
+    """HLS playlists and segments for a signed token. No auth dependency and no DB session."""
+    if decode_video_stream_token(token, video_id) is None:
+        raise HTTPException(status_code=403, detail="Invalid or expired video link")
+
+    hls_root = os.path.realpath(hls_dir_for(video_id))
+    full_path = os.path.realpath(os.path.join(hls_root, file_path))
+    ext = os.path.splitext(full_path)[1].lower()
+    if os.path.commonpath([hls_root, full_path]) != hls_root or ext not in HLS_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not os.path.exists(full_path):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if ext == ".m3u8":
+        with open(full_path) as f:
+            body = _sign_playlist(f.read(), token)
+        return Response(content=body, media_type=HLS_MEDIA_TYPES[ext], headers={"Cache-Control": "private, no-store"})
 
+    offloaded = accel_redirect_response(full_path, media_type=HLS_MEDIA_TYPES[ext])
+    if offloaded is not None:
+        return offloaded
+    return ranged_file_response(request, full_path, media_type=HLS_MEDIA_TYPES[ext])
 
+@router.get("/thumbnail/{video_id}")
+async def get_video_thumbnail(video_id: int, token: str):
+    """Poster image written by the video worker, for a signed token from /{video_id}/stream-url.
+    No auth dependency and no DB session, so it can be used as an <img src>."""
+    if decode_video_stream_token(token, video_id) is None:
+        raise HTTPException(status_code=403, detail="Invalid or expired video link")
+    path = thumbnail_path_for(video_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": "private, max-age=86400"})
 
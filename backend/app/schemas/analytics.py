@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date, datetime
+
+class CourseViewResponse(BaseModel):
+    id: int
+    course_id: int
+    user_id: Optional[int] = None
+    viewed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class CourseStatsDailyResponse(BaseModel):
+    day: date
+    course_id: int
+    views: int
+    unique_viewers: int
+    enrollments: int
+    payments: int
+    completed_payments: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+class CourseStatsTotalResponse(BaseModel):
+    course_id: int
+    views: int
+    enrollments: int
+    payments: int
+    completed_payments: int
+    revenue: float
+
+class EngagementStatsDailyResponse(BaseModel):
+    day: date
+    engagement_type: str
+    events: int
+    unique_users: int
+
+    class Config:
+        from_attributes = True
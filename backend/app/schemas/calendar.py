@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class CalendarSyncRunResponse(BaseModel):
+    id: int
+    trigger: str
+    status: str
+    full_sync: Optional[bool] = None
+    events_seen: Optional[int] = None
+    created: Optional[int] = None
+    updated: Optional[int] = None
+    deleted: Optional[int] = None
+    duration_ms: Optional[int] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
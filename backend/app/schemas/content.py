@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 class ContentAccessCheck(BaseModel):
@@ -7,5 +7,24 @@ class ContentAccessCheck(BaseModel):
     is_locked: bool
     unlock_message: Optional[str] = None
 
+class VideoStreamUrlResponse(BaseModel):
+    stream_url: str
+    hls_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    expires_at: datetime
 
+class VideoUploadInit(BaseModel):
+    filename: str
+    total_size: int
+    lesson_id: Optional[int] = None
 
+class VideoUploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    total_size: int
+    offset: int
+    status: str
+    video_content_id: Optional[int] = None
+
+class LessonAccessBatchRequest(BaseModel):
+    lesson_ids: List[int] = Field(..., min_length=1, max_length=500)
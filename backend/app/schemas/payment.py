@@ -21,6 +21,11 @@ class PaymentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AdminPaymentResponse(PaymentResponse):
+    payment_method: Optional[str] = None
+    failure_reason: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
 class RazorpayOrderResponse(BaseModel):
     order_id: str
     amount: float
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, field_validator
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -35,6 +35,13 @@ class UserUpdate(BaseModel):
     phone: Optional[str] = None
     profile_data: Optional[str] = None
 
+# Roles the app checks for (require_admin / require_role); anything else would never match
+UserRole = Literal["prospect", "admin"]
+
+class AdminUserUpdate(BaseModel):
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
 class UserResponse(UserBase):
     id: int
     role: str
@@ -55,11 +62,16 @@ class VerifyPhoneRequest(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class RegisterResponse(BaseModel):
     user: UserResponse
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
 
 class ForgotPasswordRequest(BaseModel):
     email: str
@@ -0,0 +1,106 @@
+"""
+Print EXPLAIN plans for the queries behind the per-user and per-course endpoints,
+to check they hit the indexes from migration 20261017_05 instead of seq-scanning:
+
+    python -m app.scripts.explain_queries --user-id 42 --course-id 3
+    python -m app.scripts.explain_queries --analyze   # runs the queries (read-only, rolled back)
+
+On a near-empty dev database Postgres will still prefer seq scans; run this against
+a copy of production data (or pass --no-seqscan to see which index would be used).
+"""
+import argparse
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import and_, case, exists, func, or_, select, tuple_
+from sqlalchemy.sql import Select
+
+from app.core.database import engine
+import app.models  # noqa: F401  (register all mappers)
+from app.models.career import InterviewPrep, Resume
+from app.models.certification import Certification
+from app.models.course import Course, Enrollment, Lesson, Module
+from app.models.dashboard_summary import UserDashboardSummary
+from app.models.live_class import LiveClass, LiveClassAttendee
+from app.models.note import Note
+from app.models.onboarding import OnboardingStep
+from app.models.payment import Payment
+from app.services.dashboard_summary import summary_query
+
+
+def endpoint_queries(user_id: int, course_id: int, email: str) -> List[Tuple[str, Select]]:
+    now = datetime.now(timezone.utc)
+    upcoming = LiveClass.scheduled_at >= now
+    visible = or_(
+        exists().where(Enrollment.user_id == user_id, Enrollment.course_id == LiveClass.course_id),
+        exists().where(LiveClassAttendee.live_class_id == LiveClass.id, LiveClassAttendee.email == email),
+    )
+    return [
+        ("GET /api/courses/{id} (modules)",
+         select(Module).where(Module.course_id == course_id).order_by(Module.order_index, Module.id)),
+        ("GET /api/courses/{id} (lessons)",
+         select(Lesson).join(Module).where(Module.course_id == course_id).order_by(Lesson.order_index, Lesson.id)),
+        ("POST /api/courses/{id}/enroll (existing check)",
+         select(Enrollment).where(Enrollment.user_id == user_id, Enrollment.course_id == course_id)),
+        ("GET /api/courses/my/enrollments",
+         select(Enrollment).where(Enrollment.user_id == user_id)),
+        ("GET /api/live-classes (feed, first page)",
+         select(LiveClass).where(visible).order_by(
+             case((upcoming, 0), else_=1),
+             case((upcoming, LiveClass.scheduled_at)).asc(),
+             case((upcoming, LiveClass.id)).asc(),
+             case((~upcoming, LiveClass.scheduled_at)).desc(),
+             case((~upcoming, LiveClass.id)).desc(),
+         ).limit(51)),
+        ("GET /api/live-classes?course_id= (upcoming)",
+         select(LiveClass).where(LiveClass.course_id == course_id, upcoming)
+         .order_by(LiveClass.scheduled_at, LiveClass.id).limit(51)),
+        ("GET /api/live-classes (past page via cursor)",
+         select(LiveClass).where(visible, ~upcoming, tuple_(LiveClass.scheduled_at, LiveClass.id) < tuple_(now, 0))
+         .order_by(LiveClass.scheduled_at.desc(), LiveClass.id.desc()).limit(51)),
+        ("GET /api/dashboard/summary (rollup row)",
+         select(UserDashboardSummary).where(UserDashboardSummary.user_id == user_id)),
+        ("GET /api/dashboard/summary (rebuild on miss)",
+         summary_query(user_id, now)),
+        ("GET /api/payments/history",
+         select(Payment).where(Payment.user_id == user_id)),
+        ("GET /api/notes?lesson_id=",
+         select(Note).where(Note.user_id == user_id, Note.lesson_id == 1)),
+        ("POST /api/certifications/{id}/generate (existing check)",
+         select(Certification).where(Certification.user_id == user_id, Certification.course_id == course_id)),
+        ("POST /api/onboarding (existing step)",
+         select(OnboardingStep).where(OnboardingStep.user_id == user_id, OnboardingStep.step_name == "profile")),
+        ("GET /api/career/interview-prep",
+         select(InterviewPrep).where(InterviewPrep.user_id == user_id)),
+        ("GET /api/career/resumes",
+         select(Resume).where(Resume.user_id == user_id)),
+        ("GET /api/admin/stats (enrollments per course)",
+         select(Course.id, func.count(Enrollment.id))
+         .join(Enrollment, and_(Enrollment.course_id == Course.id), isouter=True).group_by(Course.id)),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--course-id", type=int, default=1)
+    parser.add_argument("--email", default="student@example.com")
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (executes the queries)")
+    parser.add_argument("--no-seqscan", action="store_true", help="SET enable_seqscan = off for this session")
+    args = parser.parse_args()
+
+    options = "ANALYZE, BUFFERS" if args.analyze else "COSTS"
+    with engine.connect() as conn:
+        if args.no_seqscan:
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for title, stmt in endpoint_queries(args.user_id, args.course_id, args.email.strip().lower()):
+            compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+            plan = conn.exec_driver_sql(f"EXPLAIN ({options}) {compiled}", compiled.params).scalars().all()
+            print(f"== {title}")
+            print("\n".join(plan))
+            print()
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
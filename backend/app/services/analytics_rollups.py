@@ -0,0 +1,165 @@
+"""
+Incremental daily rollups of the raw analytics/event tables:
+
+    course_stats_daily      views, unique viewers (course_views), enrollments, orders,
+                            completed orders and revenue (payments) per UTC day and course
+    engagement_stats_daily  events and unique users per UTC day and engagement type
+    signup_stats_daily      new users per UTC day
+
+A single watermark (analytics_watermarks) marks how far the sources have been folded in.
+Each run finds the days touched by source rows newer than the watermark and recomputes
+just those days from the raw tables, so reruns are idempotent and distinct counts stay
+exact. The watermark trails now() by ANALYTICS_ROLLUP_LAG_SECONDS so rows from
+still-open transactions (timestamped at transaction start) are not skipped.
+Deleting raw rows is not reflected until that day is touched again.
+
+Run by the analytics worker (python -m app.workers.analytics_worker).
+"""
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import Date, and_, cast, delete, distinct, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.analytics import (
+    AnalyticsWatermark, CourseStatsDaily, CourseView, EngagementStatsDaily, SignupStatsDaily, UserEngagement,
+)
+from app.models.course import Enrollment
+from app.models.payment import Payment
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "daily_rollups"
+ADVISORY_LOCK_KEY = 7_201_020  # one aggregator at a time
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _utc_day(column):
+    return cast(func.timezone("UTC", column), Date)
+
+
+def _in_days(column, days: List[date]):
+    """Rows of `column` falling on one of `days` (UTC); the outer range keeps it index-friendly."""
+    start = datetime.combine(days[0], time.min, tzinfo=timezone.utc)
+    end = datetime.combine(days[-1] + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return and_(column >= start, column < end, _utc_day(column).in_(days))
+
+
+def _touched_days(db: Session, day_column, changed) -> List[date]:
+    return sorted(d for d in db.scalars(select(_utc_day(day_column)).where(changed).distinct()) if d)
+
+
+def _upsert(db: Session, table, keys: List[str], metrics: List[str], source) -> None:
+    stmt = insert(table).from_select(keys + metrics, source)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={m: stmt.excluded[m] for m in metrics},
+    ))
+
+
+def _refresh_course_views(db: Session, days: List[date]) -> None:
+    db.execute(update(CourseStatsDaily).where(CourseStatsDaily.day.in_(days)).values(views=0, unique_viewers=0))
+    day = _utc_day(CourseView.viewed_at)
+    _upsert(db, CourseStatsDaily, ["day", "course_id"], ["views", "unique_viewers"], (
+        select(day, CourseView.course_id, func.count(), func.count(distinct(CourseView.user_id)))
+        .where(_in_days(CourseView.viewed_at, days))
+        .group_by(day, CourseView.course_id)
+    ))
+
+
+def _refresh_enrollments(db: Session, days: List[date]) -> None:
+    db.execute(update(CourseStatsDaily).where(CourseStatsDaily.day.in_(days)).values(enrollments=0))
+    day = _utc_day(Enrollment.purchased_at)
+    _upsert(db, CourseStatsDaily, ["day", "course_id"], ["enrollments"], (
+        select(day, Enrollment.course_id, func.count())
+        .where(_in_days(Enrollment.purchased_at, days))
+        .group_by(day, Enrollment.course_id)
+    ))
+
+
+def _refresh_payments(db: Session, days: List[date]) -> None:
+    db.execute(
+        update(CourseStatsDaily).where(CourseStatsDaily.day.in_(days))
+        .values(payments=0, completed_payments=0, revenue=0.0)
+    )
+    day = _utc_day(Payment.created_at)
+    completed = Payment.status == "completed"
+    _upsert(db, CourseStatsDaily, ["day", "course_id"], ["payments", "completed_payments", "revenue"], (
+        select(
+            day, Payment.course_id, func.count(),
+            func.count().filter(completed),
+            func.coalesce(func.sum(Payment.amount).filter(completed), 0.0),
+        )
+        .where(_in_days(Payment.created_at, days), Payment.course_id.isnot(None))
+        .group_by(day, Payment.course_id)
+    ))
+
+
+def _refresh_engagement(db: Session, days: List[date]) -> None:
+    db.execute(delete(EngagementStatsDaily).where(EngagementStatsDaily.day.in_(days)))
+    day = _utc_day(UserEngagement.created_at)
+    _upsert(db, EngagementStatsDaily, ["day", "engagement_type"], ["events", "unique_users"], (
+        select(day, UserEngagement.engagement_type, func.count(), func.count(distinct(UserEngagement.user_id)))
+        .where(_in_days(UserEngagement.created_at, days))
+        .group_by(day, UserEngagement.engagement_type)
+    ))
+
+
+def _refresh_signups(db: Session, days: List[date]) -> None:
+    db.execute(delete(SignupStatsDaily).where(SignupStatsDaily.day.in_(days)))
+    day = _utc_day(User.created_at)
+    _upsert(db, SignupStatsDaily, ["day"], ["signups"], (
+        select(day, func.count()).where(_in_days(User.created_at, days)).group_by(day)
+    ))
+
+
+def run_rollups(db: Session, now: Optional[datetime] = None) -> Optional[Dict[str, int]]:
+    """Fold source rows newer than the watermark into the rollups. Commits.
+    Returns days refreshed per source, or None if another aggregator holds the lock."""
+    if not db.scalar(select(func.pg_try_advisory_xact_lock(ADVISORY_LOCK_KEY))):
+        db.rollback()
+        return None
+
+    mark = db.get(AnalyticsWatermark, WATERMARK_NAME)
+    low = mark.watermark if mark else EPOCH
+    high = (now or datetime.now(timezone.utc)) - timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG_SECONDS)
+    if high <= low:
+        db.rollback()
+        return {}
+
+    def window(column):
+        return and_(column > low, column <= high)
+
+    sources = [
+        ("course_views", CourseView.viewed_at, window(CourseView.viewed_at), _refresh_course_views),
+        ("enrollments", Enrollment.purchased_at, window(Enrollment.purchased_at), _refresh_enrollments),
+        # Status changes (pending -> completed) move revenue on the order's day
+        ("payments", Payment.created_at, or_(window(Payment.created_at), window(Payment.updated_at)),
+         _refresh_payments),
+        ("engagement", UserEngagement.created_at, window(UserEngagement.created_at), _refresh_engagement),
+        ("signups", User.created_at, window(User.created_at), _refresh_signups),
+    ]
+    refreshed: Dict[str, int] = {}
+    for name, day_column, changed, refresh in sources:
+        days = _touched_days(db, day_column, changed)
+        if days:
+            refresh(db, days)
+        refreshed[name] = len(days)
+
+    stmt = insert(AnalyticsWatermark).values(name=WATERMARK_NAME, watermark=high)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[AnalyticsWatermark.name],
+        set_={"watermark": high, "updated_at": func.now()},
+    ))
+    db.commit()
+    logger.info("Analytics rollups up to %s: %s", high.isoformat(), refreshed)
+    return refreshed
+
+
+def rollup_watermark(db: Session) -> Optional[datetime]:
+    mark = db.get(AnalyticsWatermark, WATERMARK_NAME)
+    return mark.watermark if mark else None
@@ -0,0 +1,94 @@
+"""
+Calendar sync runs. The admin endpoint and the scheduler only insert a calendar_sync_runs
+row; the calendar worker (python -m app.workers.calendar_worker) claims and executes it,
+recording duration and counts. The table doubles as run history.
+"""
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.calendar_sync import CalendarSyncRun
+from app.services.calendar_sync import sync_calendar_to_live_classes
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def request_run(db: Session, trigger: str, requested_by: Optional[int] = None) -> CalendarSyncRun:
+    """Queue a run, or return the one already pending/running so repeated clicks don't pile up. Commits."""
+    active = (
+        db.query(CalendarSyncRun)
+        .filter(CalendarSyncRun.status.in_(ACTIVE_STATUSES))
+        .order_by(CalendarSyncRun.id)
+        .first()
+    )
+    if active:
+        return active
+    run = CalendarSyncRun(trigger=trigger, requested_by=requested_by, status="pending")
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def claim_pending_run(db: Session) -> Optional[CalendarSyncRun]:
+    run = (
+        db.query(CalendarSyncRun)
+        .filter(CalendarSyncRun.status == "pending")
+        .order_by(CalendarSyncRun.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not run:
+        db.rollback()
+        return None
+    run.status = "running"
+    run.started_at = datetime.now(timezone.utc)
+    db.commit()
+    return run
+
+
+def fail_abandoned_runs(db: Session) -> int:
+    """Runs left "running" by a worker that died. Only call while holding the sync lock."""
+    count = (
+        db.query(CalendarSyncRun)
+        .filter(CalendarSyncRun.status == "running")
+        .update(
+            {
+                CalendarSyncRun.status: "failed",
+                CalendarSyncRun.error: "Worker exited during the run",
+                CalendarSyncRun.finished_at: datetime.now(timezone.utc),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return count
+
+
+def execute_run(db: Session, run: CalendarSyncRun, client=None) -> bool:
+    """Run the sync for a claimed run and record the outcome. Returns True on success."""
+    start = time.monotonic()
+    try:
+        result = sync_calendar_to_live_classes(db, client=client)
+        run.status = "succeeded"
+        run.full_sync = result.full_sync
+        run.events_seen = result.events_seen
+        run.created = result.created
+        run.updated = result.updated
+        run.deleted = result.deleted
+        ok = True
+    except Exception as e:
+        db.rollback()
+        logger.exception("Calendar sync run %s failed: %s", run.id, e)
+        run.status = "failed"
+        run.error = str(e)[:2000]
+        ok = False
+    run.duration_ms = int((time.monotonic() - start) * 1000)
+    run.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    return ok
@@ -2,19 +2,27 @@
 Sync Google Calendar events to LiveClass rows.
 Uses GOOGLE_APPLICATION_CREDENTIALS (service account JSON) and GOOGLE_CALENDAR_ID.
 Share the calendar with the service account email so it can read events.
+Sync is incremental: the Calendar nextSyncToken is kept in calendar_sync_state, so a run
+only fetches changed events, and rows are upserted/diffed in bulk rather than per event.
 """
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.models.calendar_sync import CalendarSyncState
 from app.models.live_class import LiveClass, LiveClassAttendee
 from app.models.course import Course
+from app.services.dashboard_summary import drop_course_summaries
 
 logger = logging.getLogger(__name__)
 
+SYNC_LOOKBACK_DAYS = 30  # a full sync lists events from this many days ago onwards
+EVENTS_PAGE_SIZE = 2500  # API maximum
+
 
 def _get_calendar_service():
     """Build Google Calendar API service using service account credentials."""
@@ -95,88 +103,191 @@ def _duration_minutes_from_event(event: dict) -> Optional[int]:
     return None
 
 
-def sync_calendar_to_live_classes(db: Session) -> Tuple[int, int]:
+class SyncTokenExpired(Exception):
+    """Calendar API returned 410 Gone: the stored syncToken is no longer valid."""
+
+
+class GoogleCalendarClient:
     """
-    Fetch events from Google Calendar and upsert LiveClass rows.
-    Returns (created_count, updated_count).
+    Thin wrapper over the Calendar API events.list call. sync_calendar_to_live_classes
+    accepts any object with the same list_events signature (e.g. a fake returning canned pages).
     """
-    if not settings.GOOGLE_CALENDAR_ID:
-        logger.warning("GOOGLE_CALENDAR_ID not set; skipping calendar sync")
-        return 0, 0
 
-    course_id = settings.GOOGLE_CALENDAR_DEFAULT_COURSE_ID
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        logger.warning("GOOGLE_CALENDAR_DEFAULT_COURSE_ID=%s course not found; skipping sync", course_id)
-        return 0, 0
-
-    service = _get_calendar_service()
-    time_min = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-    time_max = (datetime.now(timezone.utc) + timedelta(days=180)).isoformat()
-
-    events_result = (
-        service.events()
-        .list(
-            calendarId=settings.GOOGLE_CALENDAR_ID,
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy="startTime",
-        )
-        .execute()
-    )
-    events = events_result.get("items", [])
+    def __init__(self, service=None):
+        self._service = service or _get_calendar_service()
+
+    def list_events(self, calendar_id: str, sync_token: Optional[str] = None,
+                    page_token: Optional[str] = None, time_min: Optional[str] = None) -> dict:
+        params = {"calendarId": calendar_id, "singleEvents": True, "maxResults": EVENTS_PAGE_SIZE}
+        if page_token:
+            params["pageToken"] = page_token
+        if sync_token:
+            # timeMin/timeMax/orderBy are not allowed together with syncToken
+            params["syncToken"] = sync_token
+        elif time_min:
+            params["timeMin"] = time_min
+        try:
+            return self._service.events().list(**params).execute()
+        except Exception as e:
+            if getattr(getattr(e, "resp", None), "status", None) == 410:
+                raise SyncTokenExpired() from e
+            raise
+
 
-    created, updated = 0, 0
+class SyncResult(NamedTuple):
+    created: int
+    updated: int
+    deleted: int
+    full_sync: bool
+    events_seen: int = 0
+
+
+def _fetch_all_pages(client, calendar_id: str, sync_token: Optional[str], time_min: str):
+    """Follow nextPageToken to the end. Returns (events, nextSyncToken)."""
+    events, page_token = [], None
+    while True:
+        page = client.list_events(calendar_id, sync_token=sync_token, page_token=page_token, time_min=time_min)
+        events.extend(page.get("items", []))
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return events, page.get("nextSyncToken")
+
+
+def _chunks(items: list, size: int = 500):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _apply_events(db: Session, events: list, course_id: int) -> Tuple[int, int, int, Dict[str, int]]:
+    """Bulk upsert/delete LiveClass rows for `events`. Returns (created, updated, deleted, event id -> class id)."""
+    # Later pages can repeat an event (edited mid-listing); the last version wins
+    latest = {}
     for event in events:
+        if event.get("id"):
+            latest[event["id"]] = event
+
+    existing_ids: Set[str] = set()
+    for chunk in _chunks(list(latest)):
+        existing_ids.update(
+            row.calendar_event_id
+            for row in db.query(LiveClass.calendar_event_id).filter(LiveClass.calendar_event_id.in_(chunk))
+        )
+
+    cancelled = [eid for eid, e in latest.items() if e.get("status") == "cancelled" and eid in existing_ids]
+    deleted = 0
+    for chunk in _chunks(cancelled):
+        deleted += db.query(LiveClass).filter(LiveClass.calendar_event_id.in_(chunk)).delete(synchronize_session=False)
+
+    rows = []
+    for event_id, event in latest.items():
         if event.get("status") == "cancelled":
-            existing = db.query(LiveClass).filter(LiveClass.calendar_event_id == event["id"]).first()
-            if existing:
-                db.delete(existing)
             continue
-
-        event_id = event.get("id")
         scheduled_at = _scheduled_at_from_event(event)
         if not scheduled_at:
             continue
+        rows.append({
+            "calendar_event_id": event_id,
+            "course_id": course_id,
+            "title": (event.get("summary") or "Live Class").strip() or "Live Class",
+            "description": (event.get("description") or "").strip() or None,
+            "meet_link": _meet_link_from_event(event) or settings.GOOGLE_MEET_BASE_URL or "https://meet.google.com",
+            "scheduled_at": scheduled_at,
+            "duration": _duration_minutes_from_event(event),
+        })
 
-        meet_link = _meet_link_from_event(event)
-        if not meet_link:
-            meet_link = settings.GOOGLE_MEET_BASE_URL or "https://meet.google.com"
-
-        title = (event.get("summary") or "Live Class").strip() or "Live Class"
-        description = (event.get("description") or "").strip() or None
-        duration = _duration_minutes_from_event(event)
-
-        existing = db.query(LiveClass).filter(LiveClass.calendar_event_id == event_id).first()
-        if existing:
-            existing.title = title
-            existing.description = description
-            existing.meet_link = meet_link
-            existing.scheduled_at = scheduled_at
-            existing.duration = duration
-            existing.course_id = course_id
-            updated += 1
-            live_class_row = existing
-        else:
-            live_class_row = LiveClass(
-                course_id=course_id,
-                title=title,
-                description=description,
-                meet_link=meet_link,
-                scheduled_at=scheduled_at,
-                duration=duration,
-                calendar_event_id=event_id,
-            )
-            db.add(live_class_row)
-            db.flush()
-            created += 1
-
-        # Replace attendees so candidates invited (any domain) see this event in LMS
-        db.query(LiveClassAttendee).filter(LiveClassAttendee.live_class_id == live_class_row.id).delete()
-        for email in _attendee_emails_from_event(event):
-            db.add(LiveClassAttendee(live_class_id=live_class_row.id, email=email))
+    class_ids: Dict[str, int] = {}
+    for chunk in _chunks(rows):
+        stmt = insert(LiveClass).values(chunk)
+        # recording_url / is_completed are set in the LMS and must survive a re-sync
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LiveClass.calendar_event_id],
+            set_={col: stmt.excluded[col] for col in (
+                "course_id", "title", "description", "meet_link", "scheduled_at", "duration"
+            )},
+        ).returning(LiveClass.id, LiveClass.calendar_event_id)
+        class_ids.update({event_id: class_id for class_id, event_id in db.execute(stmt)})
 
+    created = sum(1 for row in rows if row["calendar_event_id"] not in existing_ids)
+    _sync_attendees(db, {class_ids[eid]: _attendee_emails_from_event(latest[eid]) for eid in class_ids})
+    return created, len(rows) - created, deleted, class_ids
+
+
+def _sync_attendees(db: Session, wanted: Dict[int, List[str]]) -> None:
+    """Make live_class_attendees match `wanted` (class id -> emails), touching only the differences."""
+    current: Dict[int, Dict[str, int]] = {class_id: {} for class_id in wanted}
+    for chunk in _chunks(list(wanted)):
+        for att_id, class_id, email in db.query(
+            LiveClassAttendee.id, LiveClassAttendee.live_class_id, LiveClassAttendee.email
+        ).filter(LiveClassAttendee.live_class_id.in_(chunk)):
+            current[class_id][email] = att_id
+
+    to_delete, to_insert = [], []
+    for class_id, emails in wanted.items():
+        have = current[class_id]
+        to_delete.extend(att_id for email, att_id in have.items() if email not in emails)
+        to_insert.extend({"live_class_id": class_id, "email": email} for email in emails if email not in have)
+
+    for chunk in _chunks(to_delete):
+        db.query(LiveClassAttendee).filter(LiveClassAttendee.id.in_(chunk)).delete(synchronize_session=False)
+    for chunk in _chunks(to_insert):
+        db.execute(insert(LiveClassAttendee).values(chunk).on_conflict_do_nothing())
+
+
+def sync_calendar_to_live_classes(db: Session, client=None) -> SyncResult:
+    """
+    Incrementally sync Google Calendar events into LiveClass rows.
+    The first run (or one after the API expires our syncToken with 410) lists every event
+    from SYNC_LOOKBACK_DAYS ago onwards; later runs only fetch what changed since the stored
+    nextSyncToken. `client` defaults to GoogleCalendarClient().
+    """
+    calendar_id = settings.GOOGLE_CALENDAR_ID
+    if not calendar_id:
+        logger.warning("GOOGLE_CALENDAR_ID not set; skipping calendar sync")
+        return SyncResult(0, 0, 0, False)
+
+    course_id = settings.GOOGLE_CALENDAR_DEFAULT_COURSE_ID
+    course = db.query(Course).filter(Course.id == course_id).first()
+    if not course:
+        logger.warning("GOOGLE_CALENDAR_DEFAULT_COURSE_ID=%s course not found; skipping sync", course_id)
+        return SyncResult(0, 0, 0, False)
+
+    client = client or GoogleCalendarClient()
+    state = db.query(CalendarSyncState).filter(CalendarSyncState.calendar_id == calendar_id).first()
+    if state is None:
+        state = CalendarSyncState(calendar_id=calendar_id)
+        db.add(state)
+
+    time_min_dt = datetime.now(timezone.utc) - timedelta(days=SYNC_LOOKBACK_DAYS)
+    time_min = time_min_dt.isoformat()
+    full_sync = not state.sync_token
+    try:
+        events, next_sync_token = _fetch_all_pages(client, calendar_id, state.sync_token, time_min)
+    except SyncTokenExpired:
+        logger.info("Calendar syncToken expired (410); running a full resync")
+        full_sync = True
+        events, next_sync_token = _fetch_all_pages(client, calendar_id, None, time_min)
+
+    created, updated, deleted, class_ids = _apply_events(db, events, course_id)
+
+    if full_sync:
+        # A full listing has no "cancelled" entries for events deleted while we had no token:
+        # anything in the window that the calendar no longer returns is gone.
+        seen = set(class_ids) | {e["id"] for e in events if e.get("id")}
+        stale = db.query(LiveClass).filter(
+            LiveClass.calendar_event_id.isnot(None),
+            LiveClass.scheduled_at >= time_min_dt,
+        )
+        if seen:
+            stale = stale.filter(LiveClass.calendar_event_id.notin_(seen))
+        deleted += stale.delete(synchronize_session=False)
+        state.last_full_sync_at = datetime.now(timezone.utc)
+
+    state.sync_token = next_sync_token
+    if created or updated or deleted:
+        db.execute(drop_course_summaries(course_id))
     db.commit()
-    logger.info("Calendar sync: created=%s, updated=%s", created, updated)
-    return created, updated
+    logger.info(
+        "Calendar sync (%s): %s events, created=%s, updated=%s, deleted=%s",
+        "full" if full_sync else "incremental", len(events), created, updated, deleted,
+    )
+    return SyncResult(created, updated, deleted, full_sync, len(events))
@@ -0,0 +1,113 @@
+"""
+Dashboard summary for one user: enrollments, amount paid, upcoming and recorded live
+classes of enrolled courses.
+
+compute_summary() gets all four numbers in one CTE query. With DASHBOARD_SUMMARY_ROLLUP
+on, the result is kept in user_dashboard_summaries, so a dashboard load is a primary-key
+read. Write paths keep that table current in their own transaction:
+  - payment completion/refund drops the user's row (services/payments.py)
+  - enrolling drops the user's row (drop_user_summary); class counts depend on courses
+  - live-class create/update and calendar sync drop the rows of everyone enrolled in
+    that course (drop_course_summaries)
+A dropped or expired row is rebuilt on the next read. Rows expire when the next class
+starts (it stops being "upcoming") and after DASHBOARD_SUMMARY_MAX_AGE_SECONDS, which
+bounds the effect of a write racing a rebuild.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, func, select, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.course import Enrollment
+from app.models.dashboard_summary import UserDashboardSummary
+from app.models.live_class import LiveClass
+from app.models.payment import Payment
+from app.schemas.dashboard import DashboardSummary
+
+
+def summary_query(user_id: int, now: datetime):
+    enrolled = select(Enrollment.course_id).where(Enrollment.user_id == user_id).cte("enrolled")
+    paid = (
+        select(func.coalesce(func.sum(Payment.amount), 0).label("total_paid"))
+        .where(Payment.user_id == user_id, Payment.status == "completed")
+        .cte("paid")
+    )
+    upcoming = LiveClass.scheduled_at >= now
+    classes = (
+        select(
+            func.count().filter(upcoming).label("upcoming"),
+            func.count().filter(
+                and_(LiveClass.is_completed == True, LiveClass.recording_url.isnot(None))
+            ).label("recorded"),
+            func.min(LiveClass.scheduled_at).filter(upcoming).label("next_class_at"),
+        )
+        .where(LiveClass.course_id.in_(select(enrolled.c.course_id)))
+        .cte("classes")
+    )
+    return (
+        select(
+            select(func.count()).select_from(enrolled).scalar_subquery().label("enrollments_count"),
+            paid.c.total_paid,
+            classes.c.upcoming,
+            classes.c.recorded,
+            classes.c.next_class_at,
+        )
+        .select_from(paid)
+        .join(classes, true())
+    )
+
+
+async def compute_summary(db: AsyncSession, user_id: int, now: datetime):
+    """(DashboardSummary, time the next upcoming class starts or None) in one round trip."""
+    row = (await db.execute(summary_query(user_id, now))).one()
+    summary = DashboardSummary(
+        enrollments_count=row.enrollments_count or 0,
+        total_paid=float(row.total_paid or 0),
+        upcoming_live_classes_count=row.upcoming or 0,
+        recorded_classes_count=row.recorded or 0,
+    )
+    return summary, row.next_class_at
+
+
+async def get_dashboard_summary(db: AsyncSession, user_id: int) -> DashboardSummary:
+    now = datetime.now(timezone.utc)
+    if not settings.DASHBOARD_SUMMARY_ROLLUP:
+        summary, _ = await compute_summary(db, user_id, now)
+        return summary
+
+    cached = await db.get(UserDashboardSummary, user_id)
+    if cached is not None and cached.valid_until > now:
+        return DashboardSummary(
+            enrollments_count=cached.enrollments_count,
+            total_paid=cached.total_paid,
+            upcoming_live_classes_count=cached.upcoming_live_classes_count,
+            recorded_classes_count=cached.recorded_classes_count,
+        )
+
+    summary, next_class_at = await compute_summary(db, user_id, now)
+    valid_until = now + timedelta(seconds=settings.DASHBOARD_SUMMARY_MAX_AGE_SECONDS)
+    if next_class_at is not None and next_class_at < valid_until:
+        valid_until = next_class_at
+    values = dict(summary.dict(), valid_until=valid_until)
+    stmt = insert(UserDashboardSummary).values(user_id=user_id, **values)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserDashboardSummary.user_id],
+        set_=dict(values, updated_at=func.now()),
+    ))
+    await db.commit()
+    return summary
+
+
+# Write-path statements. They return SQL so both Session and AsyncSession callers can
+# execute them inside the transaction that makes the change.
+
+def drop_user_summary(user_id: int):
+    return delete(UserDashboardSummary).where(UserDashboardSummary.user_id == user_id)
+
+
+def drop_course_summaries(course_id: int):
+    return delete(UserDashboardSummary).where(
+        UserDashboardSummary.user_id.in_(select(Enrollment.user_id).where(Enrollment.course_id == course_id))
+    )
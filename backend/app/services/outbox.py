@@ -0,0 +1,98 @@
+"""
+Transactional outbox. A write path calls enqueue() in the same transaction as the change
+(e.g. payment completed), so the follow-up is recorded if and only if the change commits,
+and the request does not wait for it. The outbox worker (python -m app.workers.outbox_worker)
+claims due events in batches with FOR UPDATE SKIP LOCKED and runs the registered handlers.
+
+Delivery is at least once: a worker that dies mid-batch leaves its events pending for the
+next claim. Each event is unique on dedupe_key, so enqueueing the same effect twice is a
+no-op. Handlers must be idempotent. DB-only handlers get exactly-once behaviour because
+their writes commit together with the event's "done" mark.
+Failed handlers are retried with exponential backoff, up to OUTBOX_MAX_ATTEMPTS; after
+that the event is marked "failed" and kept for inspection.
+
+No handlers are registered yet. payment.completed / payment.refunded are recorded for
+future consumers (receipts, emails) and marked done as they are claimed; anything the
+app itself depends on, such as the dashboard summary, is done in the request.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Session, dict], None]
+_handlers: Dict[str, List[Handler]] = {}
+
+
+def handles(event_type: str):
+    """Register a handler for `event_type`; every handler of an event runs in its transaction."""
+    def register(fn: Handler) -> Handler:
+        _handlers.setdefault(event_type, []).append(fn)
+        return fn
+    return register
+
+
+def enqueue(event_type: str, dedupe_key: str, payload: dict):
+    """Statement that records an event; execute it in the transaction that makes the change."""
+    stmt = insert(OutboxEvent).values(event_type=event_type, dedupe_key=dedupe_key, payload=payload)
+    return stmt.on_conflict_do_nothing(index_elements=[OutboxEvent.dedupe_key])
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def dispatch_batch(db: Session, batch_size: int) -> int:
+    """Claim up to `batch_size` due events, run their handlers and commit. Returns events claimed."""
+    now = datetime.now(timezone.utc)
+    events = db.scalars(
+        select(OutboxEvent)
+        .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.available_at, OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    for event in events:
+        event.attempts += 1
+        try:
+            # Savepoint: one failing event must not roll back the rest of the batch
+            with db.begin_nested():
+                for handler in _handlers.get(event.event_type, []):
+                    handler(db, event.payload)
+        except Exception as e:
+            event.last_error = str(e)[:2000]
+            if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                event.status = "failed"
+                logger.error("Outbox event %s (%s) failed permanently: %s", event.id, event.event_type, e)
+            else:
+                event.available_at = now + _retry_delay(event.attempts)
+                logger.warning("Outbox event %s (%s) failed, attempt %s: %s",
+                               event.id, event.event_type, event.attempts, e)
+            continue
+        event.status = "done"
+        event.processed_at = now
+        event.last_error = None
+
+    db.commit()
+    return len(events)
+
+
+def prune_processed(db: Session) -> int:
+    """Delete events handled more than OUTBOX_RETENTION_DAYS ago. Commits."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted = db.execute(
+        delete(OutboxEvent).where(OutboxEvent.status == "done", OutboxEvent.processed_at < cutoff)
+    ).rowcount
+    db.commit()
+    return deleted
+
@@ -0,0 +1,325 @@
+"""
+Payment gateway calls kept off the event loop.
+
+razorpay.Client is synchronous (requests). Calls run on a small dedicated thread pool with
+a per-call timeout, both on the HTTP request and on the await. Once RAZORPAY_MAX_WORKERS
+calls are running and RAZORPAY_MAX_QUEUE more are waiting, further calls get a 503 instead
+of queueing. A circuit breaker opens after RAZORPAY_BREAKER_FAILURES consecutive gateway
+failures and fails fast for RAZORPAY_BREAKER_RESET_SECONDS. Then a single trial call
+decides whether it closes again.
+
+Only idempotent operations are retried (with jittered exponential backoff). Order creation
+is made retry-safe by giving every order a unique receipt: before retrying, we look the
+receipt up, so an order created by an attempt that timed out is reused, not duplicated.
+
+PAYMENT_GATEWAY=fake swaps in FakePaymentGateway, which creates orders locally and signs
+payments with RAZORPAY_KEY_SECRET the way Razorpay does, so load tests run offline.
+Counters are per worker process; see GET /api/admin/payments/gateway.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import random
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentGatewayUnavailable(HTTPException):
+    """Gateway timed out, is failing, or too many calls are in flight; clients should retry later."""
+
+    def __init__(self, detail: str = "Payment gateway is unavailable. Please try again shortly."):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(max(1, int(settings.RAZORPAY_BREAKER_RESET_SECONDS)))},
+        )
+
+
+class PaymentGatewayError(HTTPException):
+    """The gateway rejected the request (4xx); retrying the same call will not help."""
+
+    def __init__(self, detail: str = "Payment gateway rejected the request"):
+        super().__init__(status_code=status.HTTP_502_BAD_GATEWAY, detail=detail)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open (fail fast) -> half-open (one trial call)."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def abandon_trial(self) -> None:
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Payment gateway circuit opened after %s failures", self._failures)
+                self._opened_at = time.monotonic()
+
+
+class GatewayMetrics:
+    """Per-operation call, error, timeout and latency counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops: Dict[str, Dict[str, float]] = {}
+
+    def record(self, op: str, outcome: str, seconds: Optional[float] = None) -> None:
+        with self._lock:
+            data = self._ops.setdefault(op, {
+                "calls_total": 0, "success_total": 0, "errors_total": 0, "timeouts_total": 0,
+                "rejected_total": 0, "retries_total": 0, "latency_seconds_total": 0.0, "latency_seconds_max": 0.0,
+            })
+            if outcome != "retry":
+                data["calls_total"] += 1
+            data[{"retry": "retries_total", "success": "success_total", "error": "errors_total",
+                  "timeout": "timeouts_total", "rejected": "rejected_total"}[outcome]] += 1
+            if seconds is not None:
+                data["latency_seconds_total"] += seconds
+                data["latency_seconds_max"] = max(data["latency_seconds_max"], seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {op: dict(data) for op, data in self._ops.items()}
+
+
+class RazorpayGateway:
+    """Blocking Razorpay API calls; run them through call_gateway(), never on the event loop."""
+
+    def __init__(self):
+        import razorpay
+
+        self._razorpay = razorpay
+        self.client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+
+    def create_order(self, data: dict) -> dict:
+        return self.client.order.create(data=data, timeout=settings.RAZORPAY_TIMEOUT_SECONDS)
+
+    def find_order_by_receipt(self, receipt: str) -> Optional[dict]:
+        page = self.client.order.all({"receipt": receipt}, timeout=settings.RAZORPAY_TIMEOUT_SECONDS)
+        items = page.get("items") or []
+        return items[0] if items else None
+
+    def verify_payment_signature(self, params: dict) -> bool:
+        """Local HMAC check; no network call."""
+        try:
+            self.client.utility.verify_payment_signature(params)
+            return True
+        except self._razorpay.errors.SignatureVerificationError:
+            return False
+
+    def is_retryable(self, exc: Exception) -> bool:
+        import requests
+
+        return isinstance(exc, (
+            requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+            self._razorpay.errors.GatewayError, self._razorpay.errors.ServerError,
+        ))
+
+
+class FakePaymentGateway:
+    """Offline stand-in for load tests and local development."""
+
+    def __init__(self):
+        self._orders: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def create_order(self, data: dict) -> dict:
+        order = {"id": "order_fake" + secrets.token_hex(7), "entity": "order", "status": "created", **data}
+        with self._lock:
+            self._orders[order["receipt"]] = order
+        return order
+
+    def find_order_by_receipt(self, receipt: str) -> Optional[dict]:
+        with self._lock:
+            return self._orders.get(receipt)
+
+    @staticmethod
+    def sign_payment(order_id: str, payment_id: str) -> str:
+        """Signature Checkout would return for (order_id, payment_id); load tests use it to call verify."""
+        message = f"{order_id}|{payment_id}".encode()
+        return hmac.new(settings.RAZORPAY_KEY_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+    def verify_payment_signature(self, params: dict) -> bool:
+        expected = self.sign_payment(params["razorpay_order_id"], params["razorpay_payment_id"])
+        return hmac.compare_digest(expected, params.get("razorpay_signature") or "")
+
+    def is_retryable(self, exc: Exception) -> bool:
+        return isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def _build_gateway():
+    if settings.PAYMENT_GATEWAY == "fake":
+        if settings.ENVIRONMENT == "production":
+            raise RuntimeError("PAYMENT_GATEWAY=fake is not allowed in production")
+        logger.warning("Using the fake payment gateway: no real orders are created")
+        return FakePaymentGateway()
+    return RazorpayGateway()
+
+
+gateway = _build_gateway()
+breaker = CircuitBreaker(settings.RAZORPAY_BREAKER_FAILURES, settings.RAZORPAY_BREAKER_RESET_SECONDS)
+metrics = GatewayMetrics()
+
+_executor = ThreadPoolExecutor(max_workers=settings.RAZORPAY_MAX_WORKERS, thread_name_prefix="razorpay")
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def set_gateway(new_gateway) -> None:
+    """Swap the gateway implementation (e.g. a FakePaymentGateway in load-test harnesses)."""
+    global gateway
+    gateway = new_gateway
+
+
+async def _attempt(op: str, fn: Callable[[], Any]) -> Any:
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.RAZORPAY_MAX_WORKERS + settings.RAZORPAY_MAX_QUEUE:
+            metrics.record(op, "rejected")
+            raise PaymentGatewayUnavailable("Too many payment requests right now. Please try again shortly.")
+        _pending += 1
+    try:
+        if not breaker.allow():
+            metrics.record(op, "rejected")
+            raise PaymentGatewayUnavailable()
+        started = time.monotonic()
+        try:
+            # Slightly longer than the HTTP timeout so requests' own timeout normally fires first
+            result = await asyncio.wait_for(
+                asyncio.get_running_loop().run_in_executor(_executor, fn),
+                timeout=settings.RAZORPAY_TIMEOUT_SECONDS + 1,
+            )
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            metrics.record(op, "timeout", time.monotonic() - started)
+            raise TimeoutError(f"Payment gateway {op} timed out")
+        except asyncio.CancelledError:
+            # Client went away mid-call: no verdict on the gateway
+            breaker.abandon_trial()
+            raise
+        except Exception as e:
+            if gateway.is_retryable(e):
+                breaker.record_failure()
+            else:
+                # The gateway answered (e.g. 400 Bad Request): it is healthy
+                breaker.record_success()
+            metrics.record(op, "error", time.monotonic() - started)
+            raise
+        breaker.record_success()
+        metrics.record(op, "success", time.monotonic() - started)
+        return result
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def call_gateway(op: str, fn: Callable[[], Any], retry: bool = False,
+                       before_retry: Optional[Callable[[], Any]] = None) -> Any:
+    """
+    Run blocking gateway call `fn` off the event loop. With `retry`, timeouts and transient
+    errors are retried up to RAZORPAY_RETRIES times. `before_retry`, if given, runs before
+    each retry and its non-None result is returned instead (the earlier attempt went through).
+    """
+    attempts = 1 + (settings.RAZORPAY_RETRIES if retry else 0)
+    for attempt in range(attempts):
+        try:
+            if attempt and before_retry is not None:
+                found = await _attempt(op + ".lookup", before_retry)
+                if found is not None:
+                    return found
+            return await _attempt(op, fn)
+        except PaymentGatewayUnavailable:
+            raise
+        except Exception as e:
+            transient = isinstance(e, TimeoutError) or gateway.is_retryable(e)
+            if not transient:
+                logger.warning("Payment gateway %s rejected: %s", op, e)
+                raise PaymentGatewayError()
+            if attempt + 1 >= attempts:
+                logger.error("Payment gateway %s failed after %s attempt(s): %s", op, attempts, e)
+                raise PaymentGatewayUnavailable()
+            metrics.record(op, "retry")
+            delay = settings.RAZORPAY_RETRY_BASE_SECONDS * (2 ** attempt)
+            await asyncio.sleep(random.uniform(0, delay))  # full jitter
+
+
+def new_receipt(course_id: int, user_id: int) -> str:
+    """Unique per order (Razorpay allows 40 chars), so a retried create can find its order."""
+    return f"course_{course_id}_user_{user_id}_{secrets.token_hex(4)}"[:40]
+
+
+async def create_order(data: dict) -> dict:
+    """Create a gateway order; `data` must carry a unique receipt (new_receipt)."""
+    current = gateway
+    return await call_gateway(
+        "order.create",
+        lambda: current.create_order(data),
+        retry=True,
+        before_retry=lambda: current.find_order_by_receipt(data["receipt"]),
+    )
+
+
+def verify_payment_signature(params: dict) -> bool:
+    return gateway.verify_payment_signature(params)
+
+
+def gateway_status() -> Dict[str, Any]:
+    with _pending_lock:
+        pending = _pending
+    return {
+        "gateway": type(gateway).__name__,
+        "circuit": breaker.state,
+        "in_flight": pending,
+        "max_workers": settings.RAZORPAY_MAX_WORKERS,
+        "max_queue": settings.RAZORPAY_MAX_QUEUE,
+        "operations": metrics.snapshot(),
+    }
+
+
+def shutdown_gateway_pool() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
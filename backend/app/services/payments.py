@@ -0,0 +1,118 @@
+"""
+Payment state transitions shared by /api/payments/verify and the Razorpay webhook.
+
+Both paths may see the same payment at the same time (the browser's verify call and the
+payment.captured delivery usually race). Callers load the Payment row FOR UPDATE, so
+the second one waits and then sees status "completed". complete_payment() then returns
+without writing. The enrollment is an INSERT ... ON CONFLICT on the unique
+(user_id, course_id) index, so the two paths never create duplicates.
+
+Enrollment and dropping the buyer's cached dashboard summary stay in the request: course
+access depends on the first, and the second keeps the next dashboard load from showing
+stale courses or a stale total paid. payment.completed / payment.refunded are also
+recorded in the outbox in the same transaction, for consumers to come (none yet).
+"""
+import hashlib
+import hmac
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.course import Enrollment
+from app.models.payment import Payment, ProcessedWebhookEvent
+from app.services.dashboard_summary import drop_user_summary
+from app.services.outbox import enqueue
+
+# A refunded payment is final: a replayed verify or captured event must not re-enroll the buyer
+COMPLETABLE_STATUSES = ("pending", "failed")
+
+
+def verify_webhook_signature(body: bytes, signature: Optional[str]) -> bool:
+    """HMAC-SHA256 of the raw request body with RAZORPAY_WEBHOOK_SECRET (X-Razorpay-Signature)."""
+    if not settings.RAZORPAY_WEBHOOK_SECRET or not signature:
+        return False
+    expected = hmac.new(settings.RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def webhook_event_id(header_value: Optional[str], body: bytes) -> str:
+    """X-Razorpay-Event-Id, or a digest of the body for deliveries without one."""
+    return header_value or "sha256:" + hashlib.sha256(body).hexdigest()
+
+
+def claim_webhook_event(db: Session, event_id: str, event: str) -> bool:
+    """
+    Record `event_id` as processed in the caller's transaction. False if it already was
+    (a retry or replay). A concurrent delivery of the same event blocks on the insert
+    until the first commits, then gets False.
+    """
+    stmt = insert(ProcessedWebhookEvent).values(event_id=event_id, event=event or "")
+    return db.scalar(stmt.on_conflict_do_nothing().returning(ProcessedWebhookEvent.event_id)) is not None
+
+
+def lock_payment(db: Session, *criteria) -> Optional[Payment]:
+    return db.scalars(select(Payment).where(*criteria).with_for_update()).first()
+
+
+def complete_payment(db: Session, payment: Payment, razorpay_payment_id: Optional[str],
+                     razorpay_signature: Optional[str] = None) -> bool:
+    """
+    Mark a pending or failed payment (loaded with lock_payment) completed, enroll the buyer
+    and queue payment.completed. Returns False, having written nothing, for any other status
+    (already completed, or refunded).
+    """
+    if payment.status not in COMPLETABLE_STATUSES:
+        return False
+    if razorpay_payment_id:
+        payment.razorpay_payment_id = razorpay_payment_id
+    if razorpay_signature:
+        payment.razorpay_signature = razorpay_signature
+    payment.status = "completed"
+    payment.failure_reason = None
+
+    enrollment_id = None
+    if payment.course_id is not None:
+        stmt = insert(Enrollment).values(user_id=payment.user_id, course_id=payment.course_id, status="enrolled")
+        # An earlier refund left the row behind with another status: re-activate it
+        enrollment_id = db.scalar(stmt.on_conflict_do_update(
+            index_elements=[Enrollment.user_id, Enrollment.course_id],
+            set_={"status": "enrolled"},
+            where=Enrollment.status != "enrolled",
+        ).returning(Enrollment.id))
+    # Total paid changes even when the buyer was already enrolled
+    db.execute(drop_user_summary(payment.user_id))
+
+    db.execute(enqueue("payment.completed", f"payment.completed:{payment.id}", {
+        "payment_id": payment.id,
+        "user_id": payment.user_id,
+        "course_id": payment.course_id,
+        "amount": payment.amount,
+        "enrolled": enrollment_id is not None,
+    }))
+    return True
+
+
+def refund_payment(db: Session, payment: Payment) -> bool:
+    """
+    Mark a fully refunded payment (loaded with lock_payment) refunded, revoke the
+    enrollment and queue payment.refunded. False, with no writes, if already refunded.
+    """
+    if payment.status == "refunded":
+        return False
+    payment.status = "refunded"
+    db.execute(
+        update(Enrollment)
+        .where(Enrollment.user_id == payment.user_id, Enrollment.course_id == payment.course_id)
+        .values(status="refunded")
+    )
+    db.execute(drop_user_summary(payment.user_id))
+    db.execute(enqueue("payment.refunded", f"payment.refunded:{payment.id}", {
+        "payment_id": payment.id,
+        "user_id": payment.user_id,
+        "course_id": payment.course_id,
+        "amount": payment.amount,
+    }))
+    return True
@@ -0,0 +1,92 @@
+"""
+Rotating refresh tokens. Only the sha256 of a token is stored. Every /api/auth/refresh
+revokes the presented token and issues a new one in the same family; presenting an
+already-revoked token means it was copied, so the whole family is revoked and the
+user has to log in again.
+"""
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidRefreshToken(Exception):
+    pass
+
+
+def _hash(raw_token: str) -> str:
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+def issue_refresh_token(db, user_id: int, family_id: Optional[str] = None) -> str:
+    """Add a new refresh token row (Session or AsyncSession; caller commits) and return the raw token."""
+    raw_token = secrets.token_urlsafe(48)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=_hash(raw_token),
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return raw_token
+
+
+def revoke_user_refresh_tokens(user_id: int):
+    """UPDATE statement revoking every live refresh token of a user; execute it on either session type."""
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+
+
+def _revoke_family(family_id: str):
+    return (
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+
+
+async def rotate_refresh_token(db: AsyncSession, raw_token: str) -> Tuple[User, str]:
+    """Consume `raw_token` and return (user, new raw token). Commits. Raises InvalidRefreshToken."""
+    row = await db.scalar(
+        select(RefreshToken).where(RefreshToken.token_hash == _hash(raw_token)).with_for_update()
+    )
+    if row is None:
+        raise InvalidRefreshToken("Unknown refresh token")
+    if row.revoked_at is not None:
+        logger.warning("Refresh token reuse for user %s; revoking family %s", row.user_id, row.family_id)
+        await db.execute(_revoke_family(row.family_id))
+        await db.commit()
+        raise InvalidRefreshToken("Refresh token already used")
+    if row.expires_at < datetime.now(timezone.utc):
+        raise InvalidRefreshToken("Refresh token expired")
+
+    user = await db.scalar(select(User).where(User.id == row.user_id))
+    if user is None or not user.is_active:
+        await db.execute(_revoke_family(row.family_id))
+        await db.commit()
+        raise InvalidRefreshToken("Inactive user")
+
+    row.revoked_at = datetime.now(timezone.utc)
+    new_token = issue_refresh_token(db, user.id, row.family_id)
+    await db.commit()
+    return user, new_token
+
+
+async def revoke_refresh_token(db: AsyncSession, raw_token: str) -> None:
+    """Log out: revoke the token's whole family. Unknown tokens are ignored."""
+    family_id = await db.scalar(select(RefreshToken.family_id).where(RefreshToken.token_hash == _hash(raw_token)))
+    if family_id:
+        await db.execute(_revoke_family(family_id))
+        await db.commit()
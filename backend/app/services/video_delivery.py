@@ -0,0 +1,217 @@
+"""
+Serve video files over HTTP with byte-range support (RFC 7233).
+Handles Range / If-Range / If-None-Match so players can seek without re-downloading
+from byte 0. Whole-file responses go through FileResponse; partial responses are
+read from disk in CHUNK_SIZE pieces.
+When VIDEO_ACCEL_REDIRECT_LOCATION is set, the bytes are handed off to nginx instead
+(X-Accel-Redirect), which serves them with sendfile and handles ranges itself.
+"""
+import mimetypes
+import os
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import aiofiles
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+MAX_RANGES = 16  # more than this and we just send the whole file
+
+VIDEO_MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".ogg": "video/ogg",
+}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def media_type_for(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return VIDEO_MEDIA_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """Strong validator derived from size and mtime; changes whenever the file is replaced."""
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a `Range: bytes=...` header into sorted, merged (start, end) inclusive pairs.
+    Returns None when the header is malformed (caller should ignore it and send 200).
+    Raises RangeNotSatisfiable when no requested range overlaps the file.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start_s, sep, end_s = part.partition("-")
+        if not sep:
+            return None
+        start_s, end_s = start_s.strip(), end_s.strip()
+        try:
+            if start_s == "":
+                # Suffix range: last N bytes
+                length = int(end_s)
+                if length <= 0:
+                    continue
+                start, end = max(file_size - length, 0), file_size - 1
+            else:
+                start = int(start_s)
+                end = int(end_s) if end_s else file_size - 1
+                if end_s and start > end:
+                    return None
+                end = min(end, file_size - 1)
+        except ValueError:
+            return None
+        if start < 0:
+            return None
+        if start >= file_size:
+            continue
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_matches(if_range: str, etag: str, stat_result: os.stat_result) -> bool:
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag  # strong comparison only
+    try:
+        return int(parsedate_to_datetime(if_range).timestamp()) == int(stat_result.st_mtime)
+    except (TypeError, ValueError):
+        return False
+
+
+def _etag_in(header: str, etag: str) -> bool:
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+async def _iter_file_range(path: str, start: int, end: int) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def _iter_multipart(path: str, parts: List[Tuple[bytes, int, int]], closing: bytes) -> AsyncIterator[bytes]:
+    for header, start, end in parts:
+        yield header
+        async for chunk in _iter_file_range(path, start, end):
+            yield chunk
+        yield b"\r\n"
+    yield closing
+
+
+def ranged_file_response(request: Request, path: str, media_type: Optional[str] = None) -> Response:
+    """Build a 200 / 206 / 304 / 416 response for `path` based on the request's conditional headers."""
+    stat_result = os.stat(path)
+    file_size = stat_result.st_size
+    media_type = media_type or media_type_for(path)
+    etag = file_etag(stat_result)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_in(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    ranges = None
+    if range_header and (not if_range or _if_range_matches(if_range, etag, stat_result)):
+        try:
+            ranges = parse_range_header(range_header, file_size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{file_size}"},
+            )
+
+    if not ranges or len(ranges) > MAX_RANGES:
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _iter_file_range(path, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
+        )
+
+    boundary = secrets.token_hex(16)
+    parts = []
+    content_length = 0
+    for start, end in ranges:
+        part_header = (
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+        ).encode("latin-1")
+        parts.append((part_header, start, end))
+        content_length += len(part_header) + (end - start + 1) + 2
+    closing = f"--{boundary}--\r\n".encode("latin-1")
+    content_length += len(closing)
+    headers["Content-Length"] = str(content_length)
+    return StreamingResponse(
+        _iter_multipart(path, parts, closing),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers,
+    )
+
+
+def accel_redirect_response(path: str, media_type: Optional[str] = None) -> Optional[Response]:
+    """
+    Return an empty response with X-Accel-Redirect pointing nginx at `path` under
+    VIDEO_ACCEL_REDIRECT_LOCATION. Returns None when offload is disabled or the file
+    is not inside VIDEO_DIR (the internal location can only see that directory).
+    """
+    location = settings.VIDEO_ACCEL_REDIRECT_LOCATION
+    if not location:
+        return None
+    video_root = os.path.realpath(settings.VIDEO_DIR)
+    real_path = os.path.realpath(path)
+    if os.path.commonpath([video_root, real_path]) != video_root:
+        return None
+    rel_path = os.path.relpath(real_path, video_root).replace(os.sep, "/")
+    return Response(
+        media_type=media_type or media_type_for(path),
+        headers={"X-Accel-Redirect": location.rstrip("/") + "/" + quote(rel_path)},
+    )
@@ -0,0 +1,227 @@
+"""
+Background processing for uploaded videos: probe duration, extract a thumbnail and
+package adaptive HLS renditions. Work is queued in the video_jobs table and picked up
+by the worker process (python -m app.workers.video_worker); nothing here runs inside
+a request. Requires ffmpeg/ffprobe on PATH (see FFMPEG_BINARY / FFPROBE_BINARY).
+"""
+import json
+import logging
+import os
+import shutil
+import subprocess
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.content import VideoContent, VideoJob
+
+logger = logging.getLogger(__name__)
+
+STALE_JOB_AFTER = timedelta(hours=2)  # a "running" job older than this belongs to a dead worker
+
+# height -> (video bitrate, audio bitrate) for the HLS ladder
+BITRATE_LADDER = {
+    240: ("400k", "64k"),
+    360: ("800k", "96k"),
+    480: ("1400k", "128k"),
+    720: ("2800k", "128k"),
+    1080: ("5000k", "192k"),
+}
+
+
+class VideoProcessingError(Exception):
+    """`transient` failures (ffmpeg/ffprobe exiting non-zero: killed, out of disk or memory) are retried."""
+
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
+
+def hls_dir_for(video_id: int) -> str:
+    return os.path.join(settings.VIDEO_DIR, "hls", str(video_id))
+
+
+def thumbnail_path_for(video_id: int) -> str:
+    return os.path.join(settings.VIDEO_DIR, "thumbnails", f"{video_id}.jpg")
+
+
+def enqueue_video_processing(db, video: VideoContent) -> VideoJob:
+    """Queue a processing job for a flushed VideoContent. Works with Session or AsyncSession; caller commits."""
+    video.processing_status = "pending"
+    job = VideoJob(video_content_id=video.id, status="pending", attempts=0)
+    db.add(job)
+    return job
+
+
+def _run(cmd: List[str]) -> str:
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    except FileNotFoundError as e:
+        raise VideoProcessingError(f"{cmd[0]} not found; install ffmpeg") from e
+    if result.returncode != 0:
+        raise VideoProcessingError(
+            f"{os.path.basename(cmd[0])} failed: {result.stderr.strip()[-500:]}", transient=True
+        )
+    return result.stdout
+
+
+def probe_video(path: str) -> Tuple[Optional[float], Optional[int], Optional[int]]:
+    """Return (duration seconds, width, height) of the first video stream."""
+    out = _run([
+        settings.FFPROBE_BINARY, "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "format=duration:stream=width,height",
+        "-of", "json", path,
+    ])
+    info = json.loads(out or "{}")
+    duration = info.get("format", {}).get("duration")
+    streams = info.get("streams") or [{}]
+    return (
+        float(duration) if duration else None,
+        streams[0].get("width"),
+        streams[0].get("height"),
+    )
+
+
+def extract_thumbnail(path: str, out_path: str, duration: Optional[float]) -> None:
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    at = min(5.0, duration / 10) if duration else 0
+    _run([
+        settings.FFMPEG_BINARY, "-y", "-v", "error",
+        "-ss", f"{at:.2f}", "-i", path,
+        "-frames:v", "1", "-vf", "scale=640:-2",
+        out_path,
+    ])
+
+
+def _rendition_heights(source_height: Optional[int]) -> List[int]:
+    heights = [h for h in settings.video_hls_rendition_heights if h in BITRATE_LADDER]
+    if not heights:
+        heights = [360]
+    if source_height:
+        fitting = [h for h in heights if h <= source_height]
+        # Never upscale, but always produce at least the smallest rendition
+        heights = fitting or heights[:1]
+    return heights
+
+
+def package_hls(path: str, out_dir: str, width: Optional[int], height: Optional[int]) -> str:
+    """Encode each rendition to HLS (VOD, MPEG-TS segments) and write master.m3u8. Returns its path."""
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    segment_seconds = settings.VIDEO_HLS_SEGMENT_SECONDS
+
+    variants = []
+    for h in _rendition_heights(height):
+        video_bitrate, audio_bitrate = BITRATE_LADDER[h]
+        name = f"{h}p"
+        rendition_dir = os.path.join(out_dir, name)
+        os.makedirs(rendition_dir, exist_ok=True)
+        _run([
+            settings.FFMPEG_BINARY, "-y", "-v", "error", "-i", path,
+            "-vf", f"scale=-2:{h}",
+            "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main",
+            "-b:v", video_bitrate, "-maxrate", video_bitrate, "-bufsize", video_bitrate,
+            # Keyframes on segment boundaries so players can switch renditions cleanly
+            "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})", "-sc_threshold", "0",
+            "-c:a", "aac", "-b:a", audio_bitrate, "-ac", "2",
+            "-f", "hls", "-hls_time", str(segment_seconds), "-hls_playlist_type", "vod",
+            "-hls_segment_filename", os.path.join(rendition_dir, "seg_%04d.ts"),
+            os.path.join(rendition_dir, "index.m3u8"),
+        ])
+        rendition_width = int(round(width * h / height / 2) * 2) if width and height else None
+        bandwidth = (int(video_bitrate[:-1]) + int(audio_bitrate[:-1])) * 1000
+        variants.append((name, bandwidth, rendition_width, h))
+
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for name, bandwidth, rendition_width, h in variants:
+        inf = f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth}"
+        if rendition_width:
+            inf += f",RESOLUTION={rendition_width}x{h}"
+        lines += [inf, f"{name}/index.m3u8"]
+    master_path = os.path.join(out_dir, "master.m3u8")
+    with open(master_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return master_path
+
+
+def process_video(db: Session, video: VideoContent) -> None:
+    duration, width, height = probe_video(video.file_path)
+    if duration:
+        video.duration = int(round(duration))
+
+    extract_thumbnail(video.file_path, thumbnail_path_for(video.id), duration)
+    # Base URL only: /stream-url returns it with a signed ?token= for use as an <img src>
+    video.thumbnail_url = f"/api/video/thumbnail/{video.id}"
+    db.commit()
+
+    video.hls_playlist_path = package_hls(video.file_path, hls_dir_for(video.id), width, height)
+    video.processing_status = "ready"
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    cutoff = datetime.now(timezone.utc) - STALE_JOB_AFTER
+    count = (
+        db.query(VideoJob)
+        .filter(VideoJob.status == "running", VideoJob.started_at < cutoff)
+        .update({VideoJob.status: "pending"}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+def claim_next_job(db: Session) -> Optional[VideoJob]:
+    """Lock and mark the oldest runnable job. SKIP LOCKED lets several workers share the queue."""
+    now = datetime.now(timezone.utc)
+    job = (
+        db.query(VideoJob)
+        .filter(VideoJob.status == "pending", VideoJob.run_after <= now)
+        .order_by(VideoJob.id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        db.rollback()
+        return None
+    job.status = "running"
+    job.attempts += 1
+    job.started_at = now
+    db.commit()
+    return job
+
+
+def run_next_job(db: Session) -> bool:
+    """Process one job. Returns False when the queue is empty."""
+    job = claim_next_job(db)
+    if not job:
+        return False
+
+    video = db.query(VideoContent).filter(VideoContent.id == job.video_content_id).first()
+    try:
+        if not video or not os.path.exists(video.file_path):
+            raise VideoProcessingError("Video or source file no longer exists")
+        video.processing_status = "processing"
+        db.commit()
+        process_video(db, video)
+        job.status = "done"
+        job.error = None
+        logger.info("Video %s processed (duration=%ss)", video.id, video.duration)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Video job %s failed (attempt %s): %s", job.id, job.attempts, e)
+        job.error = str(e)[:2000]
+        retryable = not isinstance(e, VideoProcessingError) or e.transient
+        if retryable and job.attempts < settings.VIDEO_JOB_MAX_ATTEMPTS:
+            job.status = "pending"
+            job.run_after = datetime.now(timezone.utc) + timedelta(minutes=2 ** job.attempts)
+        else:
+            job.status = "failed"
+            if video:
+                video.processing_status = "failed"
+    job.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    return True
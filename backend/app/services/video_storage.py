@@ -0,0 +1,92 @@
+"""
+Content-addressed storage for uploaded videos.
+Files are written to a temp file under VIDEO_DIR/.incoming, hashed (sha256) while
+they are written, then moved to VIDEO_DIR/<sha256><ext>. Uploading the same bytes
+twice ends up pointing at the one file on disk instead of a second copy.
+"""
+import hashlib
+import logging
+import os
+import shutil
+from typing import Dict, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HASH_READ_SIZE = 1024 * 1024
+
+# upload_id -> (running sha256, bytes hashed so far). Per-process only: if a chunk
+# lands on another worker (or after a restart) the entry is dropped and
+# finalize re-hashes the temp file from disk.
+_upload_hashers: Dict[str, Tuple["hashlib._Hash", int]] = {}
+
+
+def incoming_dir() -> str:
+    path = os.path.join(settings.VIDEO_DIR, ".incoming")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def temp_path_for(upload_id: str) -> str:
+    return os.path.join(incoming_dir(), f"{upload_id}.part")
+
+
+def content_path_for(sha256_hex: str, ext: str) -> str:
+    return os.path.join(settings.VIDEO_DIR, f"{sha256_hex}{ext.lower()}")
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_by_hash(temp_path: str, sha256_hex: str, ext: str) -> str:
+    """Move `temp_path` into the content store and return its final path (deduplicated by hash)."""
+    final_path = content_path_for(sha256_hex, ext)
+    if os.path.exists(final_path):
+        os.remove(temp_path)
+        logger.info("Video upload deduplicated: %s already stored", final_path)
+    else:
+        os.replace(temp_path, final_path)
+    return final_path
+
+
+def splice_part(temp_path: str, part_path: str, offset: int) -> None:
+    """Write `part_path` into the upload at `offset` and cut the upload off right after it."""
+    with open(temp_path, "r+b") as dst, open(part_path, "rb") as src:
+        dst.seek(offset)
+        shutil.copyfileobj(src, dst, HASH_READ_SIZE)
+        dst.truncate(dst.tell())
+
+
+def hasher_at(upload_id: str, offset: int):
+    """Running hash for an upload if this process has seen every byte up to `offset`, else None."""
+    entry = _upload_hashers.get(upload_id)
+    if offset == 0:
+        entry = (hashlib.sha256(), 0)
+        _upload_hashers[upload_id] = entry
+    if entry is None or entry[1] != offset:
+        _upload_hashers.pop(upload_id, None)
+        return None
+    return entry[0]
+
+
+def record_hashed(upload_id: str, digest, new_offset: int) -> None:
+    _upload_hashers[upload_id] = (digest, new_offset)
+
+
+def discard_hasher(upload_id: str) -> None:
+    _upload_hashers.pop(upload_id, None)
+
+
+def finished_hash(upload_id: str, temp_path: str, total_size: int) -> str:
+    """sha256 of a completed upload, re-reading the temp file only if the running hash is incomplete."""
+    entry = _upload_hashers.pop(upload_id, None)
+    if entry is not None and entry[1] == total_size:
+        return entry[0].hexdigest()
+    return hash_file(temp_path)
+
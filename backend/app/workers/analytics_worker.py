@@ -0,0 +1,65 @@
+"""
+Analytics rollup worker. Run alongside the API:
+
+    python -m app.workers.analytics_worker          # every ANALYTICS_ROLLUP_INTERVAL_SECONDS
+    python -m app.workers.analytics_worker --once   # single pass, e.g. from cron
+
+Each pass folds new course views, enrollments, payments, engagement events and signups
+into the daily rollup tables (see app/services/analytics_rollups.py). Safe to run more
+than one: a transaction-level advisory lock lets only one pass run at a time.
+"""
+import argparse
+import logging
+import signal
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+import app.models  # noqa: F401  (register all mappers)
+from app.services.analytics_rollups import run_rollups
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+_stopping = False
+
+
+def _stop(signum, frame):
+    global _stopping
+    logger.info("Analytics worker stopping (signal %s)", signum)
+    _stopping = True
+
+
+def run_once() -> None:
+    db = SessionLocal()
+    try:
+        if run_rollups(db) is None:
+            logger.info("Another aggregator is running; skipped")
+    except Exception as e:
+        db.rollback()
+        logger.exception("Analytics rollup failed: %s", e)
+    finally:
+        db.close()
+
+
+def run_worker() -> None:
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("Analytics worker started (every %ss)", settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS)
+    while not _stopping:
+        run_once()
+        end = time.monotonic() + settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS
+        while not _stopping and time.monotonic() < end:
+            time.sleep(1.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    if parser.parse_args().once:
+        run_once()
+    else:
+        run_worker()
@@ -0,0 +1,107 @@
+"""
+Calendar sync worker. Run alongside the API:
+
+    python -m app.workers.calendar_worker
+
+Every CALENDAR_SYNC_INTERVAL_SECONDS (plus jitter) it queues and runs a Google Calendar
+sync, and it picks up runs queued from POST /api/calendar/sync within
+CALENDAR_WORKER_POLL_SECONDS. Failures back off exponentially up to
+CALENDAR_SYNC_BACKOFF_MAX_SECONDS. Several copies can run (e.g. one per host): each pass
+takes a transaction-level Postgres advisory lock, so only one of them syncs at a time and
+the others act as standbys.
+"""
+import logging
+import random
+import signal
+import time
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+import app.models  # noqa: F401  (register all mappers)
+from app.services.calendar_runs import claim_pending_run, execute_run, fail_abandoned_runs, request_run
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+ADVISORY_LOCK_KEY = 7_201_017  # arbitrary, app-wide constant for "calendar sync"
+
+_stopping = False
+
+
+def _stop(signum, frame):
+    global _stopping
+    logger.info("Calendar worker stopping (signal %s)", signum)
+    _stopping = True
+
+
+def _sleep(seconds: float) -> None:
+    end = time.monotonic() + seconds
+    while not _stopping and time.monotonic() < end:
+        time.sleep(min(1.0, end - time.monotonic()))
+
+
+def _next_delay(consecutive_failures: int) -> float:
+    interval = settings.CALENDAR_SYNC_INTERVAL_SECONDS
+    if consecutive_failures:
+        interval = min(
+            settings.CALENDAR_SYNC_BACKOFF_MAX_SECONDS,
+            settings.CALENDAR_SYNC_BACKOFF_BASE_SECONDS * 2 ** (consecutive_failures - 1),
+        )
+    return interval + random.uniform(0, settings.CALENDAR_SYNC_JITTER_SECONDS)
+
+
+def run_worker() -> None:
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    scheduled = settings.CALENDAR_SYNC_INTERVAL_SECONDS > 0 and bool(settings.GOOGLE_CALENDAR_ID)
+    logger.info(
+        "Calendar worker started (%s)",
+        f"every {settings.CALENDAR_SYNC_INTERVAL_SECONDS}s" if scheduled else "manual runs only",
+    )
+
+    # First scheduled run after a short random delay so restarts don't stampede the API
+    next_scheduled = time.monotonic() + random.uniform(0, settings.CALENDAR_SYNC_JITTER_SECONDS)
+    failures = 0
+    held = False
+    while not _stopping:
+        try:
+            # Lock per pass, held by this transaction: if the connection drops mid-run the lock
+            # goes with it, and the next pass (here or on a standby) has to win it again
+            with engine.connect() as lock_conn, lock_conn.begin():
+                got_lock = lock_conn.execute(
+                    text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY}
+                ).scalar()
+                if got_lock:
+                    db = SessionLocal()
+                    try:
+                        if not held:
+                            logger.info("Calendar worker holds the sync lock")
+                        held = True
+                        # With the lock held nobody else is mid-run, so anything "running" was abandoned
+                        abandoned = fail_abandoned_runs(db)
+                        if abandoned:
+                            logger.info("Marked %s abandoned calendar sync runs as failed", abandoned)
+                        if scheduled and time.monotonic() >= next_scheduled:
+                            request_run(db, trigger="schedule")
+                        run = claim_pending_run(db)
+                        if run is not None:
+                            ok = execute_run(db, run)
+                            failures = 0 if ok else failures + 1
+                            next_scheduled = time.monotonic() + _next_delay(failures)
+                    finally:
+                        db.close()
+                else:
+                    held = False
+        except Exception as e:
+            held = False
+            logger.exception("Calendar worker loop error: %s", e)
+        _sleep(settings.CALENDAR_WORKER_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    run_worker()
@@ -0,0 +1,64 @@
+"""
+Outbox dispatcher. Run alongside the API:
+
+    python -m app.workers.outbox_worker
+
+Claims due outbox events in batches of OUTBOX_BATCH_SIZE and runs their handlers (see
+app/services/outbox.py). Drains back to back while there is a backlog and otherwise
+polls every OUTBOX_POLL_SECONDS. Several dispatchers can run at once: claims use
+FOR UPDATE SKIP LOCKED, so each event goes to one of them.
+"""
+import logging
+import signal
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+import app.models  # noqa: F401  (register all mappers)
+from app.services.outbox import dispatch_batch, prune_processed
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+PRUNE_EVERY_SECONDS = 3600
+
+_stopping = False
+
+
+def _stop(signum, frame):
+    global _stopping
+    logger.info("Outbox worker stopping (signal %s)", signum)
+    _stopping = True
+
+
+def run_worker() -> None:
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("Outbox worker started (batch=%s)", settings.OUTBOX_BATCH_SIZE)
+    next_prune = time.monotonic()
+    while not _stopping:
+        claimed = 0
+        db = SessionLocal()
+        try:
+            claimed = dispatch_batch(db, settings.OUTBOX_BATCH_SIZE)
+            if claimed:
+                logger.info("Dispatched %s outbox event(s)", claimed)
+            if time.monotonic() >= next_prune:
+                next_prune = time.monotonic() + PRUNE_EVERY_SECONDS
+                pruned = prune_processed(db)
+                if pruned:
+                    logger.info("Pruned %s processed outbox event(s)", pruned)
+        except Exception as e:
+            db.rollback()
+            logger.exception("Outbox dispatch failed: %s", e)
+        finally:
+            db.close()
+        if claimed < settings.OUTBOX_BATCH_SIZE:
+            time.sleep(settings.OUTBOX_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    run_worker()
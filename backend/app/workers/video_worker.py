@@ -0,0 +1,60 @@
+"""
+Video processing worker. Run alongside the API:
+
+    python -m app.workers.video_worker
+
+Polls the video_jobs table and runs ffprobe/ffmpeg for each queued upload.
+Several workers can run at once; jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED.
+"""
+import logging
+import signal
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+import app.models  # noqa: F401  (register all mappers)
+from app.services.video_processing import requeue_stale_jobs, run_next_job
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+_stopping = False
+
+
+def _stop(signum, frame):
+    global _stopping
+    logger.info("Video worker stopping after current job (signal %s)", signum)
+    _stopping = True
+
+
+def run_worker() -> None:
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("Video worker started (poll every %ss)", settings.VIDEO_WORKER_POLL_SECONDS)
+
+    db = SessionLocal()
+    try:
+        requeued = requeue_stale_jobs(db)
+        if requeued:
+            logger.info("Requeued %s stale video jobs", requeued)
+    finally:
+        db.close()
+
+    while not _stopping:
+        db = SessionLocal()
+        try:
+            worked = run_next_job(db)
+        except Exception as e:
+            logger.exception("Video worker loop error: %s", e)
+            worked = False
+        finally:
+            db.close()
+        if not worked:
+            time.sleep(settings.VIDEO_WORKER_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    run_worker()
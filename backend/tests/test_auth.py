@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import pytest
+
+
+def _token(user_id: int, issued_at: int) -> str:
+    from jose import jwt
+    from app.core.config import settings
+
+    claims = {"sub": str(user_id), "iat": issued_at, "exp": issued_at + 600}
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def test_demotion_revokes_tokens_even_with_a_cold_cache(db):
+    from fastapi import HTTPException
+    from app.core.dependencies import get_current_user
+    from app.core.user_cache import UserPrincipal, invalidate_user
+    from app.models.user import User
+    from app.routers.admin import update_user_access
+    from app.schemas.user import AdminUserUpdate
+
+    admin = User(email="admin@example.com", password_hash="x", role="admin")
+    target = User(email="target@example.com", password_hash="x", role="admin")
+    db.add_all([admin, target])
+    db.commit()
+    admin_principal = UserPrincipal(id=admin.id, role="admin", is_active=True, email=admin.email)
+    old_token = _token(target.id, int(time.time()) - 60)
+    assert get_current_user(old_token, db).role == "admin"
+
+    asyncio.run(update_user_access(target.id, AdminUserUpdate(role="prospect"), current_user=admin_principal, db=db))
+
+    # A restarted or separate process starts with an empty principal cache
+    invalidate_user(target.id)
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(old_token, db)
+    assert exc.value.status_code == 401
+
+    # Tokens issued after the change are accepted, with the new role
+    assert get_current_user(_token(target.id, int(time.time()) + 1), db).role == "prospect"
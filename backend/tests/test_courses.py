@@ -0,0 +1,45 @@
+import asyncio
+
+from tests.conftest import count_queries
+
+
+def _course_with_lessons(db, modules: int, lessons_per_module: int) -> int:
+    from app.models.course import Course, Lesson, Module
+
+    course = Course(title="Big course", price=0)
+    db.add(course)
+    db.flush()
+    # Inserted in reverse so the response order can only come from order_index
+    for m in reversed(range(modules)):
+        module = Module(course_id=course.id, title=f"Module {m}", order_index=m)
+        db.add(module)
+        db.flush()
+        for l in reversed(range(lessons_per_module)):
+            db.add(Lesson(module_id=module.id, title=f"Lesson {m}.{l}", order_index=l))
+    db.commit()
+    return course.id
+
+
+def test_get_course_runs_a_fixed_number_of_queries(db):
+    from app.core.database import AsyncSessionLocal, async_engine
+    from app.routers.courses import get_course
+    from app.schemas.course import CourseDetailResponse
+
+    course_id = _course_with_lessons(db, modules=12, lessons_per_module=15)
+
+    async def fetch():
+        async with AsyncSessionLocal() as session:
+            with count_queries(async_engine.sync_engine) as statements:
+                course = await get_course(course_id, db=session)
+                # Serializing must not trigger lazy loads (they would raise in async anyway)
+                body = CourseDetailResponse.model_validate(course)
+            return body, statements
+
+    body, statements = asyncio.run(fetch())
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+    # course, modules (IN), lessons (IN): independent of the number of modules and lessons
+    assert len(selects) == 3, selects
+    assert [m.order_index for m in body.modules] == list(range(12))
+    assert all([l.order_index for l in m.lessons] == list(range(15)) for m in body.modules)
+    assert sum(len(m.lessons) for m in body.modules) == 12 * 15
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+
+def _pending_payment(db):
+    from app.models.course import Course
+    from app.models.payment import Payment
+    from app.models.user import User
+
+    user = User(email="buyer@example.com", password_hash="x", role="prospect")
+    course = Course(title="Paid course", price=499)
+    db.add_all([user, course])
+    db.flush()
+    payment = Payment(
+        user_id=user.id, course_id=course.id, amount=499, razorpay_order_id="order_test1", status="pending"
+    )
+    db.add(payment)
+    db.commit()
+    return user, course, payment
+
+
+def _verify(db, user):
+    from app.core.user_cache import UserPrincipal
+    from app.routers.payments import verify_payment
+    from app.schemas.payment import PaymentVerification
+    from app.services.payment_gateway import FakePaymentGateway
+
+    verification = PaymentVerification(
+        razorpay_order_id="order_test1",
+        razorpay_payment_id="pay_test1",
+        razorpay_signature=FakePaymentGateway.sign_payment("order_test1", "pay_test1"),
+    )
+    principal = UserPrincipal(id=user.id, role=user.role, is_active=True, email=user.email)
+    return asyncio.run(verify_payment(verification, current_user=principal, db=db))
+
+
+def test_replayed_verify_does_not_undo_a_refund(db):
+    from fastapi import HTTPException
+    from app.models.course import Enrollment
+    from app.models.payment import Payment
+    from app.services.payments import lock_payment, refund_payment
+
+    user, course, payment = _pending_payment(db)
+    payment_id = payment.id
+    assert _verify(db, user).status == "completed"
+
+    assert refund_payment(db, lock_payment(db, Payment.id == payment_id))
+    db.commit()
+
+    # The same signed callback, replayed after the refund
+    with pytest.raises(HTTPException) as exc:
+        _verify(db, user)
+    assert exc.value.status_code == 409
+    db.rollback()
+
+    assert db.get(Payment, payment_id).status == "refunded"
+    enrollment = db.query(Enrollment).filter_by(user_id=user.id, course_id=course.id).one()
+    assert enrollment.status == "refunded"
+
+
+def _webhook(db, body: bytes):
+    import hashlib
+    import hmac
+    from starlette.requests import Request
+    from app.core.config import settings
+    from app.routers.payments import payment_webhook
+
+    signature = hmac.new(settings.RAZORPAY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    request = Request({
+        "type": "http", "method": "POST", "path": "/api/payments/webhook",
+        "headers": [(b"x-razorpay-signature", signature.encode())],
+    }, receive)
+    return asyncio.run(payment_webhook(request, db=db))
+
+
+def test_signed_webhook_without_a_payment_id_changes_nothing(db, monkeypatch):
+    import json
+    from fastapi import HTTPException
+    from app.core.config import settings
+    from app.models.payment import Payment
+
+    monkeypatch.setattr(settings, "RAZORPAY_WEBHOOK_SECRET", "whsec_test")
+    _user, _course, payment = _pending_payment(db)
+    payment_id = payment.id
+
+    with pytest.raises(HTTPException) as exc:
+        _webhook(db, b"[1, 2]")
+    assert exc.value.status_code == 400
+
+    # No entity id: must not match the pending payment through razorpay_payment_id IS NULL
+    body = {"event": "refund.processed", "payload": {"payment": {"entity": {"refund_status": "full"}}}}
+    assert _webhook(db, json.dumps(body).encode()) == {"status": "ok"}
+    db.expire_all()
+    assert db.get(Payment, payment_id).status == "pending"
@@ -15,11 +15,55 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+export function storeTokens(accessToken: string, refreshToken?: string | null) {
+  localStorage.setItem("token", accessToken);
+  if (refreshToken) localStorage.setItem("refresh_token", refreshToken);
+}
+
+export function clearTokens() {
+  localStorage.removeItem("token");
+  localStorage.removeItem("refresh_token");
+}
+
+// One refresh at a time: concurrent 401s wait for the same request (refresh tokens are single-use)
+let refreshing: Promise<string> | null = null;
+
+function refreshAccessToken(): Promise<string> {
+  if (!refreshing) {
+    const refreshToken = localStorage.getItem("refresh_token");
+    refreshing = (
+      refreshToken
+        ? axios
+            .post("/api/auth/refresh", { refresh_token: refreshToken })
+            .then((res) => {
+              storeTokens(res.data.access_token, res.data.refresh_token);
+              return res.data.access_token as string;
+            })
+        : Promise.reject(new Error("No refresh token"))
+    ).finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+}
+
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
+    const isAuthCall = /^\/auth\/(login|register|verify-phone|refresh|logout)/.test(original?.url ?? "");
+    if (error.response?.status === 401 && original && !original._retried && !isAuthCall) {
+      original._retried = true;
+      try {
+        const accessToken = await refreshAccessToken();
+        original.headers.Authorization = `Bearer ${accessToken}`;
+        return api(original);
+      } catch {
+        // fall through to the login redirect
+      }
+    }
     if (error.response?.status === 401) {
-      localStorage.removeItem("token");
+      clearTokens();
       window.location.href = "/login";
     }
     return Promise.reject(error);
@@ -9,6 +9,7 @@ export default function Learning() {
   const { isAuthenticated } = useAuthStore();
   const [course, setCourse] = useState<any>(null);
   const [selectedLesson, setSelectedLesson] = useState<any>(null);
+  const [access, setAccess] = useState<Record<string, any>>({});
   const [notes, setNotes] = useState<any[]>([]);
   const [newNote, setNewNote] = useState("");
   const [loading, setLoading] = useState(true);
@@ -37,6 +38,11 @@ export default function Learning() {
           setLoading(false);
         })
         .catch(() => setLoading(false));
+      // One request for the whole sidebar instead of one per lesson
+      api
+        .get(`/content/courses/${courseId}/access`)
+        .then((response) => setAccess(response.data))
+        .catch(() => {});
     }
   }, [courseId, isAuthenticated]);
 
@@ -67,12 +73,14 @@ export default function Learning() {
 
   const checkAccess = async (lesson: any) => {
     try {
-      const response = await api.get(`/content/lesson/${lesson.id}/access`);
-      if (response.data.has_access) {
+      const result =
+        access[lesson.id] ??
+        (await api.get(`/content/lesson/${lesson.id}/access`)).data;
+      if (result.has_access) {
         setSelectedLesson(lesson);
       } else {
         alert(
-          response.data.unlock_message ||
+          result.unlock_message ||
             "This lesson is locked. Please enroll in the course.",
         );
       }
@@ -15,10 +15,14 @@ interface LiveClassItem {
   is_completed: boolean;
 }
 
+const PAGE_SIZE = 50;
+
 export default function LiveClasses() {
   const { isAuthenticated } = useAuthStore();
   const [classes, setClasses] = useState<LiveClassItem[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     if (!isAuthenticated) {
@@ -27,14 +31,29 @@ export default function LiveClasses() {
     }
 
     api
-      .get("/live-classes", { params: { include_past: true } })
+      .get("/live-classes", { params: { include_past: true, limit: PAGE_SIZE } })
       .then((response) => {
         setClasses(response.data || []);
+        setNextCursor(response.headers["x-next-cursor"] || null);
         setLoading(false);
       })
       .catch(() => setLoading(false));
   }, [isAuthenticated]);
 
+  const loadMore = () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    api
+      .get("/live-classes", {
+        params: { include_past: true, limit: PAGE_SIZE, cursor: nextCursor },
+      })
+      .then((response) => {
+        setClasses((prev) => [...prev, ...(response.data || [])]);
+        setNextCursor(response.headers["x-next-cursor"] || null);
+      })
+      .finally(() => setLoadingMore(false));
+  };
+
   const now = new Date();
   const liveNow: LiveClassItem[] = [];
   const upcoming: LiveClassItem[] = [];
@@ -178,6 +197,18 @@ export default function LiveClasses() {
             )}
           </div>
         </section>
+
+        {nextCursor && (
+          <div className="flex justify-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="py-2 px-6 bg-slate-800 hover:bg-slate-700 disabled:opacity-50 text-white rounded-lg"
+            >
+              {loadingMore ? "Loading..." : "Load older classes"}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -1,5 +1,5 @@
 import { create } from "zustand";
-import api from "@/lib/api";
+import api, { storeTokens, clearTokens } from "@/lib/api";
 
 interface User {
   id: number;
@@ -35,16 +35,16 @@ export const useAuthStore = create<AuthState>((set) => ({
 
   login: async (email: string, password: string) => {
     const response = await api.post("/auth/login", { email, password });
-    const { access_token } = response.data;
-    localStorage.setItem("token", access_token);
+    const { access_token, refresh_token } = response.data;
+    storeTokens(access_token, refresh_token);
     set({ token: access_token, isAuthenticated: true });
     await useAuthStore.getState().fetchUser();
   },
 
   loginWithPhone: async (idToken: string) => {
     const response = await api.post("/auth/verify-phone", { id_token: idToken });
-    const { access_token } = response.data;
-    localStorage.setItem("token", access_token);
+    const { access_token, refresh_token } = response.data;
+    storeTokens(access_token, refresh_token);
     set({ token: access_token, isAuthenticated: true });
     await useAuthStore.getState().fetchUser();
   },
@@ -57,14 +57,18 @@ export const useAuthStore = create<AuthState>((set) => ({
     if (full_name && full_name.trim()) payload.full_name = full_name.trim();
     if (email && email.trim()) payload.email = email.trim();
     const res = await api.post("/auth/register", payload);
-    const { access_token } = res.data;
-    localStorage.setItem("token", access_token);
+    const { access_token, refresh_token } = res.data;
+    storeTokens(access_token, refresh_token);
     set({ token: access_token, isAuthenticated: true });
     await useAuthStore.getState().fetchUser();
   },
 
   logout: () => {
-    localStorage.removeItem("token");
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (refreshToken) {
+      api.post("/auth/logout", { refresh_token: refreshToken }).catch(() => {});
+    }
+    clearTokens();
     set({ user: null, token: null, isAuthenticated: false });
   },
 